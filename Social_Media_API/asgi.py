@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Social_Media_API.settings")
+# Settings pick the database connection mode from it
+os.environ.setdefault("SERVER_INTERFACE", "asgi")
 
 application = get_asgi_application()
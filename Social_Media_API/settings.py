@@ -27,9 +27,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ["SECRET_KEY"]
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Production runs with DEBUG=False, which also stops Django from keeping
+# every executed query in memory for the debug toolbar and error pages
+DEBUG = os.environ.get("DEBUG", "True") == "True"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get("ALLOWED_HOSTS", "").split(",") if host
+]
 
 
 # Application definition
@@ -41,6 +45,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "django_celery_beat",
@@ -89,9 +94,74 @@ DATABASES = {
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
         "HOST": os.environ["POSTGRES_HOST"],
         "PORT": int(os.environ["POSTGRES_PORT"]),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# "pool" keeps a psycopg connection pool in every process, "persistent"
+# keeps one connection per thread for DB_CONN_MAX_AGE seconds and "none"
+# connects for every request or task. ASGI runs synchronous code on
+# ever-changing threads, whose persistent connections would never be
+# closed, so it pools by default
+DB_CONNECTION_MODE = os.environ.get(
+    "DB_CONNECTION_MODE",
+    "pool" if os.environ.get("SERVER_INTERFACE") == "asgi" else "persistent"
+)
+
+if DB_CONNECTION_MODE == "pool":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            "max_lifetime": float(
+                os.environ.get("DB_POOL_MAX_LIFETIME", 3600)
+            ),
+            "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 600)),
+        },
+    }
+elif DB_CONNECTION_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("DB_CONN_MAX_AGE", 60)
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "user.redis_cache.AsyncRedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+API_CACHE_TTL = {
+    "post": int(os.environ.get("POST_CACHE_TTL", 300)),
+    "user": int(os.environ.get("USER_CACHE_TTL", 300)),
+}
+
+API_CACHE_LOCK_TIMEOUT = int(os.environ.get("API_CACHE_LOCK_TIMEOUT", 5))
+
+API_CACHE_LOCK_POLL_INTERVAL = 0.05
+
+METRICS_ALLOWED_NETWORKS = [
+    network
+    for network in os.environ.get(
+        "METRICS_ALLOWED_NETWORKS", "127.0.0.1/32,::1/128"
+    ).split(",")
+    if network
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -133,15 +203,49 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Collected for nginx, which serves static and media files in production
+STATIC_ROOT = os.environ.get("STATIC_ROOT", "/files/static")
+
 MEDIA_ROOT = "/files/media"
 
 MEDIA_URL = "/media/"
 
+STORAGES = {
+    "default": {
+        "BACKEND": "user.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Unreferenced blobs older than this are deleted by collect_blobs
+BLOB_GRACE_PERIOD = int(os.environ.get("BLOB_GRACE_PERIOD", 24 * 60 * 60))
+
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", 10 * 1024 * 1024))
+
+IMAGE_MAX_PIXELS = int(os.environ.get("IMAGE_MAX_PIXELS", 40_000_000))
+
+# Bodies above FILE_UPLOAD_MAX_MEMORY_SIZE are streamed to a temporary file
+FILE_UPLOAD_HANDLERS = [
+    "user.uploads.LimitedUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# Longest side in pixels of every rendition made from uploaded images
+IMAGE_RENDITIONS = {"thumbnail": 320, "feed": 1080, "full": 2048}
+
+IMAGE_RENDITION_FORMATS = {
+    "WEBP": {"quality": 80, "method": 4},
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+}
+
 AUTH_USER_MODEL = "user.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "user.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -149,6 +253,63 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Tokens expire this many seconds after their last renewal, which
+# happens at most once per renewal interval while a token is used
+AUTH_TOKEN_TTL = int(os.environ.get("AUTH_TOKEN_TTL", 14 * 24 * 60 * 60))
+
+AUTH_TOKEN_RENEW_INTERVAL = int(
+    os.environ.get("AUTH_TOKEN_RENEW_INTERVAL", 60 * 60)
+)
+
+AUTH_TOKEN_PURGE_BATCH_SIZE = int(
+    os.environ.get("AUTH_TOKEN_PURGE_BATCH_SIZE", 1000)
+)
+
+AUTH_TOKEN_PURGE_INTERVAL = int(
+    os.environ.get("AUTH_TOKEN_PURGE_INTERVAL", 60 * 60)
+)
+
+# Seconds a token's user is kept in redis and in every process
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get("AUTH_TOKEN_CACHE_TTL", 60))
+
+AUTH_TOKEN_LOCAL_TTL = int(os.environ.get("AUTH_TOKEN_LOCAL_TTL", 5))
+
+AUTH_TOKEN_LOCAL_SIZE = int(os.environ.get("AUTH_TOKEN_LOCAL_SIZE", 1024))
+
+POST_SEARCH_CONFIG = "english"
+
+USER_SEARCH_LIMIT = int(os.environ.get("USER_SEARCH_LIMIT", 10))
+
+# Shorter terms match most users and are answered with no results
+USER_SEARCH_MIN_LENGTH = int(os.environ.get("USER_SEARCH_MIN_LENGTH", 2))
+
+USER_SEARCH_TIMEOUT = int(os.environ.get("USER_SEARCH_TIMEOUT", 200))
+
+BULK_ACTION_LIMIT = int(os.environ.get("BULK_ACTION_LIMIT", 100))
+
+FEED_FAN_OUT_LIMIT = int(os.environ.get("FEED_FAN_OUT_LIMIT", 10_000))
+
+FEED_BACKFILL_DEPTH = int(os.environ.get("FEED_BACKFILL_DEPTH", 100))
+
+# Hours of hourly buckets summed into each trending window
+TRENDING_WINDOWS = {"day": 24, "week": 7 * 24}
+
+TRENDING_HALF_LIFE = int(os.environ.get("TRENDING_HALF_LIFE", 6))
+
+TRENDING_SIZE = int(os.environ.get("TRENDING_SIZE", 100))
+
+TRENDING_WEIGHTS = {"like": 1.0, "comment": 3.0}
+
+TRENDING_BATCH_SIZE = int(os.environ.get("TRENDING_BATCH_SIZE", 5000))
+
+TRENDING_INTERVAL = int(os.environ.get("TRENDING_INTERVAL", 5 * 60))
+
+SCHEDULED_POST_BATCH_SIZE = int(
+    os.environ.get("SCHEDULED_POST_BATCH_SIZE", 500)
+)
+
+SCHEDULED_POST_INTERVAL = int(os.environ.get("SCHEDULED_POST_INTERVAL", 30))
+
 CELERY_BROKER_URL = os.environ["CELERY_BROKER_URL"]
 
 CELERY_TIMEZONE = "Europe/Warsaw"
@@ -157,6 +318,21 @@ CELERY_TASK_TRACK_STARTED = True
 
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+CELERY_BEAT_SCHEDULE = {
+    "publish-scheduled-posts": {
+        "task": "user.tasks.publish_scheduled_posts",
+        "schedule": SCHEDULED_POST_INTERVAL,
+    },
+    "refresh-trending": {
+        "task": "user.tasks.refresh_trending",
+        "schedule": TRENDING_INTERVAL,
+    },
+    "purge-expired-tokens": {
+        "task": "user.tasks.purge_expired_tokens",
+        "schedule": AUTH_TOKEN_PURGE_INTERVAL,
+    },
+}
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 SPECTACULAR_SETTINGS = {
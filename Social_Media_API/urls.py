@@ -16,15 +16,25 @@ Including another URLconf
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
     SpectacularRedocView
 )
 
+from user.metrics import metrics_view
+from user.storage import BLOB_DIR, serve_blob
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics/", metrics_view, name="metrics"),
+    re_path(
+        rf"^{settings.MEDIA_URL.strip('/')}/{BLOB_DIR}/(?P<path>.+)$",
+        serve_blob,
+        name="blob"
+    ),
     path("api/v1/", include("user.urls", namespace="user")),
     path("api/v1/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
@@ -0,0 +1,55 @@
+"""
+Gunicorn settings for the production profile, all overridable from env.
+The ASGI application runs on uvicorn workers, so async views overlap
+their I/O; SERVER_INTERFACE=wsgi runs the WSGI one on gthread workers
+"""
+import multiprocessing
+import os
+import shutil
+
+SERVER_INTERFACE = os.environ.get("SERVER_INTERFACE", "asgi")
+
+if SERVER_INTERFACE == "asgi":
+    wsgi_app = "Social_Media_API.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "Social_Media_API.wsgi:application"
+    worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(
+    os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)
+)
+# Threads only apply to gthread workers, requests inside one worker
+# share its database connection pool and process-local caches
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# nginx keeps upstream connections open, so keepalive must outlive them
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 75))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Recycle workers now and then to cap slow memory growth, with jitter
+# so they do not all restart at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+# Behind nginx, which buffers slow clients and forwards their address.
+# Only its addresses or networks are trusted with X-Forwarded-* headers,
+# loopback by default for an nginx on the same host
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1,::1")
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server) -> None:
+    """Workers share metrics through files, stale ones must not count"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def child_exit(server, worker) -> None:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 
-from user.models import User, Tag, Post, Comment
+from user.models import User, Tag, Post, Comment, ScheduledPost, AuthToken
 
 
 @admin.register(User)
@@ -42,3 +42,11 @@ class UserAdmin(DjangoUserAdmin):
 admin.site.register(Tag)
 admin.site.register(Post)
 admin.site.register(Comment)
+admin.site.register(ScheduledPost)
+
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ("user", "created_at", "expires_at")
+    list_select_related = ("user",)
+    readonly_fields = ("user", "created_at", "expires_at")
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class UserConfig(AppConfig):
     name = "user"
+
+    def ready(self) -> None:
+        import user.signals  # noqa: F401
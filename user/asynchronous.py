@@ -0,0 +1,75 @@
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.core.exceptions import ValidationError
+from django.db.models import Model, QuerySet
+from django.http import Http404, HttpRequest
+from rest_framework.response import Response
+
+
+# Dispatches a DRF view on the event loop. Coroutine handlers are awaited
+# there, while authentication and synchronous handlers run in a thread,
+# so one ASGI worker can overlap many requests waiting on I/O. Kept out
+# of the docstring, which would become the description of every endpoint
+class AsyncViewMixin:
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        if not iscoroutinefunction(view):
+            markcoroutinefunction(view)
+        return view
+
+    async def dispatch(
+        self,
+        request: HttpRequest,
+        *args,
+        **kwargs
+    ) -> Response:
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            method = request.method.lower()
+            handler = self.http_method_not_allowed
+            if method in self.http_method_names:
+                handler = getattr(self, method, handler)
+            if not iscoroutinefunction(handler):
+                handler = sync_to_async(handler)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+    async def aget_queryset(self) -> QuerySet:
+        """Build the queryset in a thread, some filters run queries"""
+        return await sync_to_async(
+            lambda: self.filter_queryset(self.get_queryset())
+        )()
+
+    async def aget_object(self) -> Model:
+        queryset = await self.aget_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (
+            queryset.model.DoesNotExist, TypeError, ValueError,
+            ValidationError
+        ):
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the query."
+            )
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,125 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from user import tokens
+from user.models import User, AuthToken
+
+
+class LocalCache:
+    """Small least-recently-used cache of one process with expiring entries"""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+local_cache = LocalCache(settings.AUTH_TOKEN_LOCAL_SIZE)
+
+
+def token_cache_key(digest: str) -> str:
+    return f"auth:token:{digest}"
+
+
+def remember(digest: str, credentials: tuple[User, AuthToken]) -> None:
+    cache_key = token_cache_key(digest)
+    cache.set(cache_key, credentials, settings.AUTH_TOKEN_CACHE_TTL)
+    local_cache.set(cache_key, credentials, settings.AUTH_TOKEN_LOCAL_TTL)
+
+
+def forget_tokens(digests: Iterable[str]) -> None:
+    cache_keys = [token_cache_key(digest) for digest in digests]
+    for cache_key in cache_keys:
+        local_cache.delete(cache_key)
+    cache.delete_many(cache_keys)
+
+
+def forget_users(user_ids: Iterable[int]) -> None:
+    forget_tokens(
+        AuthToken.objects.filter(user_id__in=user_ids).values_list(
+            "digest", flat=True
+        )
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Expiring token authentication remembering which user a token belongs
+    to, first in this process and then in the shared cache. Other
+    processes may keep a revoked entry for at most AUTH_TOKEN_LOCAL_TTL
+    """
+
+    model = AuthToken
+
+    def lookup(self, digest: str) -> tuple[User, AuthToken]:
+        try:
+            token = (
+                AuthToken.objects
+                .select_related("user")
+                .defer("created_at")
+                .get(digest=digest)
+            )
+        except AuthToken.DoesNotExist:
+            raise AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        return token.user, token
+
+    def authenticate_credentials(self, key: str) -> tuple[User, AuthToken]:
+        digest = tokens.digest(key)
+        cache_key = token_cache_key(digest)
+        credentials = local_cache.get(cache_key)
+        if credentials is None:
+            credentials = cache.get(cache_key)
+            if credentials is None:
+                credentials = self.lookup(digest)
+                cache.set(
+                    cache_key, credentials, settings.AUTH_TOKEN_CACHE_TTL
+                )
+            local_cache.set(
+                cache_key, credentials, settings.AUTH_TOKEN_LOCAL_TTL
+            )
+
+        user, token = credentials
+        if token.expires_at <= timezone.now():
+            forget_tokens([digest])
+            raise AuthenticationFailed(_("Token has expired."))
+        if tokens.renew(token):
+            remember(digest, credentials)
+        # Requests must not share, and possibly modify, the cached instance
+        return copy.copy(user), token
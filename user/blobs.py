@@ -0,0 +1,128 @@
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from user.models import Blob
+from user.storage import BLOB_DIR
+
+RETAIN_SQL = """
+    INSERT INTO {blobs} (name, refcount, updated_at)
+    SELECT name, count(*), now() FROM unnest(%s::varchar[]) AS name
+    GROUP BY name ORDER BY name
+    ON CONFLICT (name) DO UPDATE
+    SET refcount = {blobs}.refcount + EXCLUDED.refcount, updated_at = now()
+"""
+
+ABANDON_SQL = """
+    INSERT INTO {blobs} (name, refcount, updated_at)
+    SELECT DISTINCT name, 0, now() FROM unnest(%s::varchar[]) AS name
+    ON CONFLICT (name) DO NOTHING
+"""
+
+RELEASE_SQL = """
+    UPDATE {blobs}
+    SET refcount = GREATEST({blobs}.refcount - released.count, 0),
+        updated_at = now()
+    FROM (
+        SELECT name, count(*) AS count FROM unnest(%s::varchar[]) AS name
+        GROUP BY name
+    ) AS released
+    WHERE {blobs}.name = released.name
+"""
+
+
+def referenced(renditions: dict) -> list[str]:
+    """Blobs held by a renditions record, the source is held by its field"""
+    return [
+        path
+        for formats in renditions.get("files", {}).values()
+        for path in formats.values()
+    ]
+
+
+def execute(sql: str, names: Iterable[str]) -> None:
+    names = list(names)
+    if not names:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.format(blobs=connection.ops.quote_name(Blob._meta.db_table)),
+            [names]
+        )
+
+
+def retain(names: Iterable[str]) -> None:
+    execute(RETAIN_SQL, names)
+
+
+def release(names: Iterable[str]) -> None:
+    execute(RELEASE_SQL, names)
+
+
+def abandon(names: Iterable[str]) -> None:
+    """Track files nothing refers to, so that collection finds them"""
+    execute(ABANDON_SQL, names)
+
+
+def stored(storage, directory: str = BLOB_DIR) -> Iterator[list[str]]:
+    """Blob names on disk, one list per directory, skipping uploads"""
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    yield [os.path.join(directory, name) for name in files]
+    for name in directories:
+        if directory == BLOB_DIR and name == "incoming":
+            continue
+        yield from stored(storage, os.path.join(directory, name))
+
+
+def sweep(cutoff: datetime, storage=default_storage) -> int:
+    """
+    Delete files without a row, left by a crash between saving a
+    file and recording it, once they are older than the cutoff
+    """
+    swept = 0
+    for names in stored(storage):
+        tracked = set(
+            Blob.objects.filter(name__in=names).values_list("name", flat=True)
+        )
+        for name in names:
+            if name in tracked or storage.get_modified_time(name) >= cutoff:
+                continue
+            storage.delete(name)
+            swept += 1
+    return swept
+
+
+def collect(grace: timedelta, storage=default_storage) -> int:
+    """
+    Delete blobs nobody referred to during the grace period. A blob
+    saved again since then has a fresh modification time and survives
+    """
+    cutoff = timezone.now() - grace
+    names = Blob.objects.filter(
+        refcount=0, updated_at__lt=cutoff
+    ).values_list("name", flat=True)
+    collected = 0
+    for name in names.iterator():
+        with transaction.atomic():
+            blob = (
+                Blob.objects
+                .select_for_update(skip_locked=True)
+                .filter(name=name, refcount=0, updated_at__lt=cutoff)
+                .first()
+            )
+            if blob is None:
+                continue
+            if storage.exists(name) and (
+                storage.get_modified_time(name) >= cutoff
+            ):
+                continue
+            storage.delete(name)
+            blob.delete()
+            collected += 1
+    return collected + sweep(cutoff, storage)
@@ -0,0 +1,138 @@
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from user.metrics import CACHE_REQUESTS
+
+VERSION_TTL = 24 * 60 * 60
+
+
+def version_key(resource: str, pk) -> str:
+    return f"{resource}:{pk}:version"
+
+
+def get_version(resource: str, pk) -> str:
+    """Return the current cache version of an object, creating one if needed"""
+    key = version_key(resource, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, VERSION_TTL)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(resource: str, pks: Iterable) -> dict:
+    """Return current cache versions of many objects in one round trip"""
+    keys = {version_key(resource, pk): pk for pk in pks}
+    versions = cache.get_many(keys)
+    missing = {
+        key: uuid.uuid4().hex for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, VERSION_TTL)
+        versions.update(missing)
+    return {pk: versions[key] for key, pk in keys.items()}
+
+
+async def aget_version(resource: str, pk) -> str:
+    key = version_key(resource, pk)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid.uuid4().hex, VERSION_TTL)
+        version = await cache.aget(key)
+    return version
+
+
+async def aget_versions(resource: str, pks: Iterable) -> dict:
+    keys = {version_key(resource, pk): pk for pk in pks}
+    versions = await cache.aget_many(keys)
+    missing = {
+        key: uuid.uuid4().hex for key in keys if key not in versions
+    }
+    if missing:
+        await cache.aset_many(missing, VERSION_TTL)
+        versions.update(missing)
+    return {pk: versions[key] for key, pk in keys.items()}
+
+
+def invalidate(resource: str, pks: Iterable) -> None:
+    """Move objects to fresh versions so their cached entries are skipped"""
+    cache.set_many(
+        {version_key(resource, pk): uuid.uuid4().hex for pk in pks},
+        VERSION_TTL
+    )
+
+
+def read_through(
+    resource: str,
+    pk,
+    compute: Callable[[], object],
+    variant: str = ""
+) -> object:
+    """
+    Return the cached value of an object or compute and store it.
+    Only one caller recomputes a missing entry, the rest wait for it
+    """
+    key = f"{resource}:{pk}:{get_version(resource, pk)}:{variant}"
+    value = cache.get(key)
+    if value is not None:
+        CACHE_REQUESTS.labels(resource, "hit").inc()
+        return value
+
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, settings.API_CACHE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + settings.API_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(settings.API_CACHE_LOCK_POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                CACHE_REQUESTS.labels(resource, "wait").inc()
+                return value
+        CACHE_REQUESTS.labels(resource, "miss").inc()
+        return compute()
+
+    CACHE_REQUESTS.labels(resource, "miss").inc()
+    try:
+        value = compute()
+        cache.set(key, value, settings.API_CACHE_TTL[resource])
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+async def aread_through(
+    resource: str,
+    pk,
+    compute: Callable[[], Awaitable[object]],
+    variant: str = ""
+) -> object:
+    """Async read_through, waiting for another computation without a thread"""
+    key = f"{resource}:{pk}:{await aget_version(resource, pk)}:{variant}"
+    value = await cache.aget(key)
+    if value is not None:
+        CACHE_REQUESTS.labels(resource, "hit").inc()
+        return value
+
+    lock_key = f"{key}:lock"
+    if not await cache.aadd(lock_key, 1, settings.API_CACHE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + settings.API_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.API_CACHE_LOCK_POLL_INTERVAL)
+            value = await cache.aget(key)
+            if value is not None:
+                CACHE_REQUESTS.labels(resource, "wait").inc()
+                return value
+        CACHE_REQUESTS.labels(resource, "miss").inc()
+        return await compute()
+
+    CACHE_REQUESTS.labels(resource, "miss").inc()
+    try:
+        value = await compute()
+        await cache.aset(key, value, settings.API_CACHE_TTL[resource])
+    finally:
+        await cache.adelete(lock_key)
+    return value
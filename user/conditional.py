@@ -0,0 +1,44 @@
+import hashlib
+from datetime import datetime
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.request import Request
+
+
+def make_etag(*parts) -> str:
+    """Hash validator parts into a quoted entity tag"""
+    return '"{}"'.format(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def not_modified(
+    request: Request,
+    etag: str,
+    last_modified: datetime = None
+) -> HttpResponse | None:
+    """Return a 304 response when the client already has this version"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp())
+    )
+    if response is not None:
+        # Caches refresh their stored entry from the validators of a 304
+        with_validators(response, etag, last_modified)
+    return response
+
+
+def with_validators(
+    response: HttpResponse,
+    etag: str,
+    last_modified: datetime = None
+) -> HttpResponse:
+    """Attach validators clients must send back to revalidate"""
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(
+            last_modified.timestamp()
+        )
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,65 @@
+from django.db.models import Count, F, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from user.models import User, Post, Comment, Like, Subscription
+
+
+def change_comments_count(post_id: int, delta: int) -> None:
+    """Atomically shift the stored number of comments of a post"""
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F("comments_count") + delta, updated_at=Now()
+    )
+
+
+def count_rows(model, lookup: str) -> Coalesce:
+    """Build a correlated COUNT(*) of `model` rows pointing at the outer row"""
+    rows = (
+        model.objects
+        .filter(**{lookup: OuterRef("pk")})
+        .order_by()
+        .values(lookup)
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def rebuild_post_counters(queryset: QuerySet[Post] = None) -> int:
+    """Recalculate stored counters of posts from the source tables"""
+    if queryset is None:
+        queryset = Post.objects.all()
+    return queryset.update(
+        likes_count=count_rows(Post.likes.through, "post"),
+        comments_count=count_rows(Comment, "post"),
+    )
+
+
+def rebuild_user_counters(queryset: QuerySet[User] = None) -> int:
+    """Recalculate stored counters of users from the source tables"""
+    if queryset is None:
+        queryset = User.objects.all()
+    return queryset.update(
+        subscriptions_count=count_rows(Subscription, "from_user"),
+        subscribers_count=count_rows(Subscription, "to_user"),
+    )
+
+
+def recount_likes(post_ids: list[int]) -> int:
+    """Recalculate stored numbers of likes of the given posts"""
+    return Post.objects.filter(pk__in=post_ids).update(
+        likes_count=count_rows(Like, "post"), updated_at=Now()
+    )
+
+
+def recount_posts(post_ids: list[int]) -> int:
+    """Recalculate stored numbers of likes and comments of the given posts"""
+    return Post.objects.filter(pk__in=post_ids).update(
+        likes_count=count_rows(Like, "post"),
+        comments_count=count_rows(Comment, "post"),
+        updated_at=Now(),
+    )
+
+
+def recount_subscriptions(user_ids: list[int]) -> int:
+    """Recalculate stored subscription counters of the given users"""
+    return rebuild_user_counters(User.objects.filter(pk__in=user_ids))
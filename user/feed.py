@@ -0,0 +1,159 @@
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from user.models import User, Post, FeedItem, Subscription
+
+FEED_BATCH_SIZE = 1000
+
+
+def pulled_authors(user: User) -> QuerySet[User]:
+    """Subscriptions whose posts are read on request instead of pushed"""
+    return user.subscriptions.filter(
+        subscribers_count__gt=settings.FEED_FAN_OUT_LIMIT
+    )
+
+
+def seek(created_at, pk, field: str, reverse: bool) -> Q:
+    """Rows after (created_at, pk) in newest first order, or before it"""
+    lookup = "gt" if reverse else "lt"
+    return Q(**{f"created_at__{lookup}": created_at}) | Q(
+        created_at=created_at, **{f"{field}__{lookup}": pk}
+    )
+
+
+def feed_queryset(
+    user: User,
+    queryset: QuerySet[Post],
+    limit: int | None = None,
+    cursor: tuple[list, bool] | None = None
+) -> QuerySet[Post]:
+    """
+    Narrow down posts to the home feed of a user, newest first. Pushed
+    posts are read in order from the feed items of the user and posts of
+    pulled authors from the author index, and the two are merged with
+    UNION ALL. Given the rows and cursor of a keyset page, each side
+    stops after `limit` rows, so a page costs two short index scans
+    """
+    direction = "" if cursor is not None and cursor[1] else "-"
+    pushed = (
+        FeedItem.objects
+        .filter(owner=user)
+        .order_by(f"{direction}created_at", f"{direction}post_id")
+        .values("post_id")
+    )
+    pulled = (
+        Post.objects
+        .filter(author__in=pulled_authors(user))
+        .order_by(f"{direction}created_at", f"{direction}id")
+        .values("id")
+    )
+    if cursor is not None:
+        (created_at, pk), reverse = cursor
+        pushed = pushed.filter(seek(created_at, pk, "post_id", reverse))
+        pulled = pulled.filter(seek(created_at, pk, "id", reverse))
+    if limit is not None:
+        pushed = pushed[:limit]
+        pulled = pulled[:limit]
+    return queryset.filter(
+        pk__in=pushed.union(pulled, all=True)
+    ).order_by("-created_at", "-id")
+
+
+def push(items: Iterable[tuple[int, int, object]]) -> int:
+    """Insert (owner_id, post_id, created_at) rows into feeds in batches"""
+    items = iter(items)
+    pushed = 0
+    while batch := list(islice(items, FEED_BATCH_SIZE)):
+        FeedItem.objects.bulk_create(
+            [
+                FeedItem(owner_id=owner_id, post_id=post_id, created_at=at)
+                for owner_id, post_id, at in batch
+            ],
+            ignore_conflicts=True
+        )
+        pushed += len(batch)
+    return pushed
+
+
+def subscriber_ids(author_id: int) -> Iterator[int]:
+    return (
+        Subscription.objects
+        .filter(to_user_id=author_id)
+        .values_list("from_user_id", flat=True)
+        .iterator(chunk_size=FEED_BATCH_SIZE)
+    )
+
+
+def recent_posts(author_id: int) -> list[tuple[int, object]]:
+    return list(
+        Post.objects
+        .filter(author_id=author_id)
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[:settings.FEED_BACKFILL_DEPTH]
+    )
+
+
+def fan_out_post(post_id: int) -> int:
+    """Push a new post into the feeds of its author's subscribers"""
+    post = Post.objects.select_related("author").filter(pk=post_id).first()
+    if (
+        post is None
+        or post.author.subscribers_count > settings.FEED_FAN_OUT_LIMIT
+    ):
+        return 0
+    return push(
+        (owner_id, post.pk, post.created_at)
+        for owner_id in subscriber_ids(post.author_id)
+    )
+
+
+def follow(user_id: int, author_id: int) -> int:
+    """Fill a feed with recent posts of a newly subscribed author"""
+    author = User.objects.filter(pk=author_id).first()
+    if (
+        author is None
+        or author.subscribers_count > settings.FEED_FAN_OUT_LIMIT
+        or not Subscription.objects.filter(
+            from_user_id=user_id, to_user_id=author_id
+        ).exists()
+    ):
+        return 0
+    return push(
+        (user_id, post_id, created_at)
+        for post_id, created_at in recent_posts(author_id)
+    )
+
+
+def unfollow(user_id: int, author_ids: Iterable[int]) -> int:
+    """Drop posts of unsubscribed authors from a feed"""
+    deleted, _ = FeedItem.objects.filter(
+        owner_id=user_id, post__author_id__in=author_ids
+    ).delete()
+    return deleted
+
+
+def resumed_authors(author_ids: Iterable[int]) -> list[int]:
+    """Authors whose subscribers just dropped back to the fan-out limit"""
+    return list(
+        User.objects
+        .filter(
+            pk__in=author_ids,
+            subscribers_count=settings.FEED_FAN_OUT_LIMIT
+        )
+        .values_list("pk", flat=True)
+    )
+
+
+def backfill(author_id: int) -> int:
+    """Push recent posts of an author into the feeds of all subscribers"""
+    posts = recent_posts(author_id)
+    if not posts:
+        return 0
+    return push(
+        (owner_id, post_id, created_at)
+        for owner_id in subscriber_ids(author_id)
+        for post_id, created_at in posts
+    )
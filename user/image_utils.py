@@ -1,7 +1,14 @@
 import os
 import uuid
+from io import BytesIO
 
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.fields.files import FieldFile
 from django.utils.text import slugify
+from PIL import Image, ImageOps
+
+RENDITION_EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg"}
 
 
 def upload_to(base_dir: str, slug_source: str, filename: str) -> str:
@@ -18,3 +25,54 @@ def upload_user_photo(instance, filename: str) -> str:
 
 def upload_post_image(instance, filename: str) -> str:
     return upload_to("uploads/posts/", instance.title, filename)
+
+
+def encode(image: Image.Image, image_format: str) -> ContentFile:
+    """Encode an image without any of the metadata of the upload"""
+    if image_format == "JPEG" and image.mode != "RGB":
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        image_format,
+        **settings.IMAGE_RENDITION_FORMATS[image_format]
+    )
+    return ContentFile(buffer.getvalue())
+
+
+def render(file: FieldFile) -> dict:
+    """
+    Decode an upload, apply and drop its EXIF orientation and save
+    every rendition size in every format next to the original
+    """
+    largest = max(settings.IMAGE_RENDITIONS.values())
+    with file.open("rb") as source:
+        image = Image.open(source)
+        image.draft("RGB", (largest, largest))
+        original = ImageOps.exif_transpose(image)
+        original.load()
+    original.info = {}
+
+    directory, filename = os.path.split(file.name)
+    stem, _ = os.path.splitext(filename)
+    files = {}
+    for name, size in settings.IMAGE_RENDITIONS.items():
+        image = original.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        files[name] = {
+            image_format.lower(): file.storage.save(
+                os.path.join(
+                    directory,
+                    "renditions",
+                    f"{stem}-{name}{extension}"
+                ),
+                encode(image, image_format)
+            )
+            for image_format, extension in RENDITION_EXTENSIONS.items()
+        }
+    return files
@@ -0,0 +1,335 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from rest_framework import status
+
+from user import cache, feed
+from user.models import User, Post, Like, Subscription
+from user.tasks import backfill_author_feeds, push_author_to_feed
+
+NOT_FOUND = "Not found."
+
+LIKE_SQL = """
+    WITH inserted AS (
+        INSERT INTO {likes} (post_id, user_id) VALUES (%s, %s)
+        ON CONFLICT (post_id, user_id) DO NOTHING
+        RETURNING post_id
+    )
+    UPDATE {posts} SET likes_count = likes_count + 1, updated_at = now()
+    WHERE id IN (SELECT post_id FROM inserted)
+"""
+
+UNLIKE_SQL = """
+    WITH deleted AS (
+        DELETE FROM {likes} WHERE post_id = %s AND user_id = %s
+        RETURNING post_id
+    )
+    UPDATE {posts} SET likes_count = likes_count - 1, updated_at = now()
+    WHERE id IN (SELECT post_id FROM deleted)
+"""
+
+SUBSCRIBE_SQL = """
+    WITH inserted AS (
+        INSERT INTO {subscriptions} (from_user_id, to_user_id)
+        VALUES (%s, %s)
+        ON CONFLICT (from_user_id, to_user_id) DO NOTHING
+        RETURNING from_user_id, to_user_id
+    ), subscriptions AS (
+        UPDATE {users} SET subscriptions_count = subscriptions_count + 1
+        WHERE id IN (SELECT from_user_id FROM inserted)
+    )
+    UPDATE {users} SET subscribers_count = subscribers_count + 1
+    WHERE id IN (SELECT to_user_id FROM inserted)
+"""
+
+UNSUBSCRIBE_SQL = """
+    WITH deleted AS (
+        DELETE FROM {subscriptions}
+        WHERE from_user_id = %s AND to_user_id = %s
+        RETURNING from_user_id, to_user_id
+    ), subscriptions AS (
+        UPDATE {users} SET subscriptions_count = subscriptions_count - 1
+        WHERE id IN (SELECT from_user_id FROM deleted)
+    )
+    UPDATE {users} SET subscribers_count = subscribers_count - 1
+    WHERE id IN (SELECT to_user_id FROM deleted)
+"""
+
+BULK_LIKE_SQL = """
+    WITH inserted AS (
+        INSERT INTO {likes} (post_id, user_id)
+        SELECT post_id, %(user)s FROM unnest(%(like)s::bigint[]) AS post_id
+        ON CONFLICT (post_id, user_id) DO NOTHING
+        RETURNING post_id
+    ), deleted AS (
+        DELETE FROM {likes}
+        WHERE user_id = %(user)s AND post_id = ANY(%(unlike)s::bigint[])
+        RETURNING post_id
+    ), changed AS (
+        SELECT post_id, 1 AS delta FROM inserted
+        UNION ALL
+        SELECT post_id, -1 FROM deleted
+    )
+    UPDATE {posts}
+    SET likes_count = likes_count + changed.delta, updated_at = now()
+    FROM changed WHERE {posts}.id = changed.post_id
+"""
+
+BULK_SUBSCRIBE_SQL = """
+    WITH inserted AS (
+        INSERT INTO {subscriptions} (from_user_id, to_user_id)
+        SELECT %(user)s, to_user_id
+        FROM unnest(%(subscribe)s::bigint[]) AS to_user_id
+        ON CONFLICT (from_user_id, to_user_id) DO NOTHING
+        RETURNING to_user_id
+    ), deleted AS (
+        DELETE FROM {subscriptions}
+        WHERE from_user_id = %(user)s
+        AND to_user_id = ANY(%(unsubscribe)s::bigint[])
+        RETURNING to_user_id
+    ), changed AS (
+        SELECT to_user_id, 1 AS delta FROM inserted
+        UNION ALL
+        SELECT to_user_id, -1 FROM deleted
+    ), subscriptions AS (
+        UPDATE {users} SET subscriptions_count = subscriptions_count + (
+            SELECT sum(delta) FROM changed
+        )
+        WHERE id = %(user)s AND EXISTS (SELECT FROM changed)
+    )
+    UPDATE {users} SET subscribers_count = subscribers_count + changed.delta
+    FROM changed WHERE {users}.id = changed.to_user_id
+"""
+
+
+def execute(sql: str, params: tuple | dict) -> int:
+    """Run a write statement and return the number of affected rows"""
+    tables = {
+        "likes": Like._meta.db_table,
+        "posts": Post._meta.db_table,
+        "subscriptions": Subscription._meta.db_table,
+        "users": get_user_model()._meta.db_table,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql.format(**{
+                name: connection.ops.quote_name(table)
+                for name, table in tables.items()
+            }),
+            params
+        )
+        return cursor.rowcount
+
+
+def like(user: User, post: Post) -> bool:
+    """Like a post in one statement, return whether the like is new"""
+    created = execute(LIKE_SQL, (post.pk, user.pk)) > 0
+    if created:
+        transaction.on_commit(lambda: cache.invalidate("post", [post.pk]))
+    return created
+
+
+def unlike(user: User, post: Post) -> bool:
+    """Unlike a post in one statement, return whether a like existed"""
+    deleted = execute(UNLIKE_SQL, (post.pk, user.pk)) > 0
+    if deleted:
+        transaction.on_commit(lambda: cache.invalidate("post", [post.pk]))
+    return deleted
+
+
+def subscribe(user: User, author: User) -> bool:
+    """Subscribe in one statement, return whether it is a new subscription"""
+    created = execute(SUBSCRIBE_SQL, (user.pk, author.pk)) > 0
+    if created:
+        transaction.on_commit(
+            lambda: cache.invalidate("user", [user.pk, author.pk])
+        )
+        transaction.on_commit(
+            lambda: push_author_to_feed.delay(user.pk, author.pk)
+        )
+    return created
+
+
+def unsubscribe(user: User, author: User) -> bool:
+    """Unsubscribe in one statement, return whether a subscription existed"""
+    with transaction.atomic():
+        deleted = execute(UNSUBSCRIBE_SQL, (user.pk, author.pk)) > 0
+        if deleted:
+            feed.unfollow(user.pk, [author.pk])
+            resume_fan_out([author.pk])
+            transaction.on_commit(
+                lambda: cache.invalidate("user", [user.pk, author.pk])
+            )
+    return deleted
+
+
+def resume_fan_out(author_ids: list[int]) -> None:
+    """Push posts made while an author was pulled once it is pushed again"""
+    for author_id in feed.resumed_authors(author_ids):
+        transaction.on_commit(
+            lambda author_id=author_id: backfill_author_feeds.delay(author_id)
+        )
+
+
+def unique(ids: list[int]) -> list[int]:
+    return list(dict.fromkeys(ids))
+
+
+def outcome(pk: int, code: int, detail: str) -> dict:
+    return {"id": pk, "status": code, "detail": detail}
+
+
+def bulk_like(
+    user: User,
+    like_ids: list[int],
+    unlike_ids: list[int]
+) -> dict[str, list[dict]]:
+    """Like and unlike many posts with set-based writes"""
+    like_ids, unlike_ids = unique(like_ids), unique(unlike_ids)
+    authors = dict(
+        Post.objects
+        .filter(pk__in=[*like_ids, *unlike_ids])
+        .values_list("pk", "author_id")
+    )
+    liked = set(
+        Like.objects
+        .filter(user=user, post_id__in=authors)
+        .values_list("post_id", flat=True)
+    )
+
+    results = {"like": [], "unlike": []}
+    to_like = []
+    to_unlike = []
+    for pk in like_ids:
+        if pk not in authors:
+            results["like"].append(
+                outcome(pk, status.HTTP_404_NOT_FOUND, NOT_FOUND)
+            )
+        elif authors[pk] == user.pk:
+            results["like"].append(outcome(
+                pk,
+                status.HTTP_400_BAD_REQUEST,
+                "You cannot like your own post"
+            ))
+        elif pk in liked:
+            results["like"].append(outcome(
+                pk, status.HTTP_200_OK, "You already liked this post"
+            ))
+        else:
+            to_like.append(pk)
+            results["like"].append(outcome(
+                pk,
+                status.HTTP_201_CREATED,
+                "You successfully liked this post"
+            ))
+    for pk in unlike_ids:
+        if pk not in authors:
+            results["unlike"].append(
+                outcome(pk, status.HTTP_404_NOT_FOUND, NOT_FOUND)
+            )
+        elif pk not in liked:
+            results["unlike"].append(outcome(
+                pk, status.HTTP_200_OK, "You did not like this post"
+            ))
+        else:
+            to_unlike.append(pk)
+            results["unlike"].append(outcome(
+                pk,
+                status.HTTP_201_CREATED,
+                "You successfully unliked this post"
+            ))
+
+    changed = [*to_like, *to_unlike]
+    if changed:
+        with transaction.atomic():
+            execute(
+                BULK_LIKE_SQL,
+                {"user": user.pk, "like": to_like, "unlike": to_unlike}
+            )
+            transaction.on_commit(lambda: cache.invalidate("post", changed))
+    return results
+
+
+def bulk_subscribe(
+    user: User,
+    subscribe_ids: list[int],
+    unsubscribe_ids: list[int]
+) -> dict[str, list[dict]]:
+    """Subscribe to and unsubscribe from many users with set-based writes"""
+    subscribe_ids = unique(subscribe_ids)
+    unsubscribe_ids = unique(unsubscribe_ids)
+    emails = dict(
+        get_user_model().objects
+        .filter(pk__in=[*subscribe_ids, *unsubscribe_ids])
+        .values_list("pk", "email")
+    )
+    subscribed = set(
+        Subscription.objects
+        .filter(from_user=user, to_user_id__in=emails)
+        .values_list("to_user_id", flat=True)
+    )
+
+    results = {"subscribe": [], "unsubscribe": []}
+    to_subscribe = []
+    to_unsubscribe = []
+    for pk in subscribe_ids:
+        if pk not in emails:
+            results["subscribe"].append(
+                outcome(pk, status.HTTP_404_NOT_FOUND, NOT_FOUND)
+            )
+        elif pk == user.pk:
+            results["subscribe"].append(outcome(
+                pk,
+                status.HTTP_400_BAD_REQUEST,
+                "You cannot subscribe to yourself"
+            ))
+        elif pk in subscribed:
+            results["subscribe"].append(outcome(
+                pk, status.HTTP_200_OK, "Already subscribed"
+            ))
+        else:
+            to_subscribe.append(pk)
+            results["subscribe"].append(outcome(
+                pk,
+                status.HTTP_201_CREATED,
+                f"You are now subscribed to {emails[pk]}"
+            ))
+    for pk in unsubscribe_ids:
+        if pk not in emails:
+            results["unsubscribe"].append(
+                outcome(pk, status.HTTP_404_NOT_FOUND, NOT_FOUND)
+            )
+        elif pk not in subscribed:
+            results["unsubscribe"].append(outcome(
+                pk,
+                status.HTTP_200_OK,
+                f"You are not subscribed to {emails[pk]}"
+            ))
+        else:
+            to_unsubscribe.append(pk)
+            results["unsubscribe"].append(outcome(
+                pk,
+                status.HTTP_201_CREATED,
+                f"You are unsubscribed from {emails[pk]}"
+            ))
+
+    changed = [*to_subscribe, *to_unsubscribe]
+    if changed:
+        with transaction.atomic():
+            execute(
+                BULK_SUBSCRIBE_SQL,
+                {
+                    "user": user.pk,
+                    "subscribe": to_subscribe,
+                    "unsubscribe": to_unsubscribe,
+                }
+            )
+            feed.unfollow(user.pk, to_unsubscribe)
+            resume_fan_out(to_unsubscribe)
+            transaction.on_commit(
+                lambda: cache.invalidate("user", [user.pk, *changed])
+            )
+            for pk in to_subscribe:
+                transaction.on_commit(
+                    lambda pk=pk: push_author_to_feed.delay(user.pk, pk)
+                )
+    return results
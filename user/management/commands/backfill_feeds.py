@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user import feed
+from user.models import User
+
+
+class Command(BaseCommand):
+    """Django command to fill home feeds from existing subscriptions."""
+
+    def handle(self, *args, **options):
+        self.stdout.write("Backfilling home feeds...")
+        authors = (
+            User.objects
+            .filter(
+                subscribers_count__gt=0,
+                subscribers_count__lte=settings.FEED_FAN_OUT_LIMIT,
+            )
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        pushed = 0
+        for author_id in authors.iterator():
+            pushed += feed.backfill(author_id)
+        self.stdout.write(
+            self.style.SUCCESS(f"Pushed {pushed} posts into home feeds")
+        )
@@ -0,0 +1,101 @@
+import statistics
+import time
+from copy import deepcopy
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from user.models import Post
+
+MODES = {
+    "none": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": 600},
+    "pool": {
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {"pool": {"min_size": 1, "max_size": 2}},
+    },
+}
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare request latency of connection modes.
+    Every simulated request reads the first page of posts and then
+    releases its connection the way request_finished does
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Simulated requests per mode",
+        )
+        parser.add_argument(
+            "--mode",
+            action="append",
+            dest="modes",
+            choices=MODES,
+            help="Mode to measure, may be repeated, all by default",
+        )
+
+    def configure(self, mode: str) -> str:
+        alias = f"benchmark_{mode}"
+        database = deepcopy(connections.settings["default"])
+        database["OPTIONS"].pop("pool", None)
+        overrides = deepcopy(MODES[mode])
+        database["OPTIONS"].update(overrides.pop("OPTIONS", {}))
+        database.update(overrides)
+        connections.settings[alias] = database
+        return alias
+
+    def measure(self, alias: str, requests: int) -> list[float]:
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            list(
+                Post.objects.using(alias)
+                .order_by("-created_at", "-id")
+                .values_list("pk", "title")[:10]
+            )
+            connections[alias].close_if_unusable_or_obsolete()
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    def release(self, alias: str) -> None:
+        connection = connections[alias]
+        connection.close()
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+        del connections[alias]
+        del connections.settings[alias]
+
+    def handle(self, *args, **options):
+        medians = {}
+        for mode in options["modes"] or MODES:
+            alias = self.configure(mode)
+            try:
+                latencies = self.measure(alias, options["requests"])
+            except ImproperlyConfigured as error:
+                self.stdout.write(self.style.WARNING(f"{mode}: {error}"))
+                del connections.settings[alias]
+                continue
+            self.release(alias)
+
+            quantiles = statistics.quantiles(latencies, n=100)
+            medians[mode] = quantiles[49]
+            self.stdout.write(
+                f"{mode:<12} p50 {quantiles[49] * 1000:>7.2f} ms  "
+                f"p95 {quantiles[94] * 1000:>7.2f} ms  "
+                f"p99 {quantiles[98] * 1000:>7.2f} ms"
+            )
+
+        if "none" in medians:
+            for mode, median in medians.items():
+                if mode != "none":
+                    saved = (medians["none"] - median) * 1000
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{mode} removes {saved:.2f} ms of connection "
+                        f"setup from p50"
+                    ))
@@ -0,0 +1,143 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from user.models import User, Post, Tag
+from user.tagging import PostTag, filter_by_tags
+
+SEED_POSTS_SQL = """
+    INSERT INTO {post} (
+        title, content, created_at, updated_at,
+        author_id, likes_count, comments_count
+    )
+    SELECT
+        'benchmark post ' || i, '',
+        now() - i * interval '1 second', now() - i * interval '1 second',
+        %s, 0, 0
+    FROM generate_series(1, %s) AS i
+"""
+
+SEED_TAGS_SQL = """
+    INSERT INTO {tag} (name)
+    SELECT 'benchmark-tag-' || i FROM generate_series(1, %s) AS i
+"""
+
+SEED_POST_TAGS_SQL = """
+    WITH tags AS (
+        SELECT array_agg(id ORDER BY id) AS ids, count(*) AS n
+        FROM {tag} WHERE name LIKE 'benchmark-tag-%%'
+    )
+    INSERT INTO {post_tag} (post_id, tag_id)
+    SELECT p.id, tags.ids[(1 + (p.id * 31 + g) %% tags.n)::int]
+    FROM {post} AS p, tags, generate_series(0, %s - 1) AS g
+    WHERE p.author_id = %s
+"""
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare tag filter plans on synthetic data.
+    Everything is seeded inside a transaction that is rolled back.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=1_000_000,
+            help="Number of synthetic posts",
+        )
+        parser.add_argument(
+            "--tags",
+            type=int,
+            default=1000,
+            help="Number of synthetic tags",
+        )
+        parser.add_argument(
+            "--tags-per-post",
+            type=int,
+            default=10,
+            help="Tags attached to every synthetic post",
+        )
+        parser.add_argument(
+            "--query-tags",
+            type=int,
+            default=2,
+            help="Number of tags in the measured filter",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Execute the queries and report actual timings",
+        )
+
+    def seed(self, posts: int, tags: int, tags_per_post: int) -> User:
+        author = User.objects.create_user(
+            "benchmark-tag-filter@example.com"
+        )
+        tables = {
+            "post": connection.ops.quote_name(Post._meta.db_table),
+            "tag": connection.ops.quote_name(Tag._meta.db_table),
+            "post_tag": connection.ops.quote_name(PostTag._meta.db_table),
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SEED_POSTS_SQL.format(**tables), [author.pk, posts]
+            )
+            cursor.execute(SEED_TAGS_SQL.format(**tables), [tags])
+            cursor.execute(
+                SEED_POST_TAGS_SQL.format(**tables),
+                [tags_per_post, author.pk]
+            )
+            for table in tables.values():
+                cursor.execute(f"ANALYZE {table}")
+        return author
+
+    def report(self, label: str, queryset, analyze: bool) -> None:
+        plan = json.loads(queryset.explain(format="json", analyze=analyze))
+        plan = plan[0]
+        line = f"{label:<32} cost {plan['Plan']['Total Cost']:>14.2f}"
+        if analyze:
+            line += f"  time {plan['Execution Time']:>10.2f} ms"
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write("Seeding synthetic posts and tags...")
+            self.seed(
+                options["posts"], options["tags"], options["tags_per_post"]
+            )
+            tags = list(
+                Tag.objects
+                .filter(name__startswith="benchmark-tag-")
+                .order_by("pk")[:options["query_tags"]]
+            )
+            tag_ids = [tag.pk for tag in tags]
+            self.stdout.write(
+                f"{PostTag.objects.count()} post-tag rows, "
+                f"filtering by {', '.join(tag.name for tag in tags)}"
+            )
+
+            page = Post.objects.order_by("-created_at", "-id")
+            queries = {
+                "join + distinct": page.filter(
+                    tags__id__in=tag_ids
+                ).distinct(),
+                "any (exists)": filter_by_tags(page, tag_ids, mode="any"),
+                "all (grouped count)": filter_by_tags(
+                    page, tag_ids, mode="all"
+                ),
+            }
+            for label, queryset in queries.items():
+                self.report(
+                    f"{label}, first page", queryset[:10], options["analyze"]
+                )
+                self.report(
+                    f"{label}, all rows",
+                    queryset.order_by(),
+                    options["analyze"]
+                )
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Synthetic data rolled back"))
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user import blobs
+
+
+class Command(BaseCommand):
+    """Django command to delete stored files no row refers to."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=settings.BLOB_GRACE_PERIOD,
+            help="Seconds a blob must stay unreferenced before deletion",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Collecting unreferenced blobs...")
+        collected = blobs.collect(timedelta(seconds=options["grace"]))
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {collected} blobs")
+        )
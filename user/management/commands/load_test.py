@@ -0,0 +1,183 @@
+import http.client
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user import tokens
+from user.models import User
+
+
+DEFAULT_PATH = "/api/v1/posts/"
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure requests per second of running servers.
+    Every target gets the same paths, concurrency and duration, so the
+    development server can be compared against the production profile.
+    Only successful responses count towards throughput and latency
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "targets",
+            nargs="+",
+            help="Base URLs to compare, e.g. http://localhost:8000",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path requested in turn, may be repeated "
+                 f"(default {DEFAULT_PATH}, which requires --email)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=16,
+            help="Simultaneous keep-alive connections",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30,
+            help="Seconds to load every target",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=float,
+            default=3,
+            help="Seconds of unmeasured load before every run",
+        )
+        parser.add_argument(
+            "--email",
+            help="Authenticate requests with this user's token",
+        )
+
+    def worker(
+        self,
+        url: str,
+        paths: list[str],
+        headers: dict,
+        deadline: float
+    ) -> tuple[list[float], int]:
+        parts = urlsplit(url)
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        connection = connection_class(parts.netloc, timeout=30)
+        latencies = []
+        errors = 0
+        sent = 0
+        while time.monotonic() < deadline:
+            path = parts.path.rstrip("/") + paths[sent % len(paths)]
+            sent += 1
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                errors += 1
+                continue
+            if response.status >= 400:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+        connection.close()
+        return latencies, errors
+
+    def run(
+        self,
+        url: str,
+        paths: list[str],
+        headers: dict,
+        concurrency: int,
+        duration: float
+    ) -> tuple[list[float], int]:
+        deadline = time.monotonic() + duration
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(
+                lambda _: self.worker(url, paths, headers, deadline),
+                range(concurrency)
+            ))
+        latencies = [value for result, _ in results for value in result]
+        return latencies, sum(errors for _, errors in results)
+
+    def report(
+        self,
+        url: str,
+        latencies: list[float],
+        errors: int,
+        duration: float
+    ) -> float:
+        rate = len(latencies) / duration
+        if len(latencies) < 2:
+            self.stdout.write(f"{url:<32} {rate:>9.1f} req/s  errors {errors}")
+            return rate
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{url:<32} {rate:>9.1f} req/s  "
+            f"p50 {quantiles[49] * 1000:>7.1f} ms  "
+            f"p95 {quantiles[94] * 1000:>7.1f} ms  "
+            f"p99 {quantiles[98] * 1000:>7.1f} ms  "
+            f"errors {errors}"
+        )
+        return rate
+
+    def handle(self, *args, **options):
+        if not options["paths"] and not options["email"]:
+            raise CommandError(
+                f"{DEFAULT_PATH} requires authentication, pass --email "
+                "or choose public paths with --path"
+            )
+        paths = options["paths"] or [DEFAULT_PATH]
+        headers = {"Connection": "keep-alive"}
+        if options["email"]:
+            try:
+                user = User.objects.get(email=options["email"])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['email']}")
+            key, _ = tokens.issue(user)
+            headers["Authorization"] = f"Token {key}"
+
+        self.stdout.write(
+            f"{options['concurrency']} connections, "
+            f"{options['duration']:g}s per target, "
+            f"paths {', '.join(paths)}"
+        )
+        rates = []
+        for url in options["targets"]:
+            if options["warmup"] > 0:
+                self.run(
+                    url,
+                    paths,
+                    headers,
+                    options["concurrency"],
+                    options["warmup"]
+                )
+            latencies, errors = self.run(
+                url,
+                paths,
+                headers,
+                options["concurrency"],
+                options["duration"]
+            )
+            rates.append(
+                self.report(url, latencies, errors, options["duration"])
+            )
+
+        baseline = rates[0]
+        if baseline:
+            for url, rate in zip(options["targets"][1:], rates[1:]):
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{url} serves {rate / baseline:.2f}x "
+                        f"the requests of {options['targets'][0]}"
+                    )
+                )
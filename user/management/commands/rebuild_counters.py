@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from user.counters import rebuild_post_counters, rebuild_user_counters
+from user.models import User, Post
+
+
+class Command(BaseCommand):
+    """Django command to rebuild denormalized counters from M2M tables."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows updated per statement",
+        )
+
+    def rebuild(self, model, rebuild_counters, batch_size: int) -> int:
+        updated = 0
+        last_id = 0
+        while True:
+            ids = list(
+                model.objects
+                .filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                return updated
+            updated += rebuild_counters(model.objects.filter(pk__in=ids))
+            last_id = ids[-1]
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        self.stdout.write("Rebuilding post counters...")
+        posts = self.rebuild(Post, rebuild_post_counters, batch_size)
+        self.stdout.write("Rebuilding user counters...")
+        users = self.rebuild(User, rebuild_user_counters, batch_size)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt counters of {posts} posts and {users} users"
+            )
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from user.models import User, Post
+from user.tasks import process_image
+
+IMAGE_FIELDS = {"post": (Post, "image"), "user": (User, "photo")}
+
+
+class Command(BaseCommand):
+    """Django command to make renditions of already uploaded images."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            choices=(*IMAGE_FIELDS, "all"),
+            default="all",
+            help="Which uploads to process",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Also redo images that already have renditions",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Process in this command instead of Celery workers",
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            IMAGE_FIELDS if options["model"] == "all" else [options["model"]]
+        )
+        queued = 0
+        for name in names:
+            model, field = IMAGE_FIELDS[name]
+            self.stdout.write(f"Reprocessing {name} images...")
+            pks = (
+                model.objects
+                .exclude(**{f"{field}__isnull": True})
+                .exclude(**{field: ""})
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            for pk in pks.iterator():
+                arguments = (model._meta.label, pk, field, options["force"])
+                if options["sync"]:
+                    process_image(*arguments)
+                else:
+                    process_image.delay(*arguments)
+                queued += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Reprocessed {queued} images")
+        )
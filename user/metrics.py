@@ -0,0 +1,103 @@
+import ipaddress
+import os
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+CACHE_REQUESTS = Counter(
+    "api_cache_requests",
+    "Read-through cache lookups by resource and outcome",
+    ("resource", "result"),
+)
+
+DB_POOL_REQUESTS = Counter(
+    "db_pool_requests",
+    "Connections requested from the pool",
+    ("alias",),
+)
+
+DB_POOL_WAITS = Counter(
+    "db_pool_waits",
+    "Connection requests that found no idle connection and queued",
+    ("alias",),
+)
+
+DB_POOL_ERRORS = Counter(
+    "db_pool_errors",
+    "Connection requests that timed out or were refused",
+    ("alias",),
+)
+
+DB_POOL_WAIT_SECONDS = Counter(
+    "db_pool_wait_seconds",
+    "Time spent queued for a pooled connection",
+    ("alias",),
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Connections held by the pools of live processes",
+    ("alias", "state"),
+    multiprocess_mode="livesum",
+)
+
+
+def record_pool_stats(**kwargs) -> None:
+    """
+    Move the counters of every opened connection pool into metrics.
+    Pool stats are reset on read, so each wait is counted once
+    """
+    for connection in connections.all(initialized_only=True):
+        pool = getattr(connection, "pool", None)
+        if pool is None:
+            continue
+        stats = pool.pop_stats()
+        alias = connection.alias
+        DB_POOL_REQUESTS.labels(alias).inc(stats.get("requests_num", 0))
+        DB_POOL_WAITS.labels(alias).inc(stats.get("requests_queued", 0))
+        DB_POOL_ERRORS.labels(alias).inc(stats.get("requests_errors", 0))
+        DB_POOL_WAIT_SECONDS.labels(alias).inc(
+            stats.get("requests_wait_ms", 0) / 1000
+        )
+        DB_POOL_CONNECTIONS.labels(alias, "open").set(stats["pool_size"])
+        DB_POOL_CONNECTIONS.labels(alias, "idle").set(
+            stats["pool_available"]
+        )
+
+
+def can_read_metrics(request: HttpRequest) -> bool:
+    """Staff users and scrapers on METRICS_ALLOWED_NETWORKS"""
+    if request.user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Expose collected metrics in the Prometheus text format"""
+    if not can_read_metrics(request):
+        raise PermissionDenied
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.10 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, lookup):
+    rows = (
+        model.objects
+        .filter(**{lookup: OuterRef("pk")})
+        .order_by()
+        .values(lookup)
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model("user", "Post")
+    Comment = apps.get_model("user", "Comment")
+    likes = Post._meta.get_field("likes").remote_field.through
+    Post.objects.update(
+        likes_count=count_rows(likes, "post"),
+        comments_count=count_rows(Comment, "post"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0003_alter_comment_id_alter_post_id_alter_tag_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
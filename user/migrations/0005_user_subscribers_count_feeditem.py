@@ -0,0 +1,81 @@
+# Generated by Django 5.2.10 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_subscribers_count(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    subscriptions = User._meta.get_field("subscriptions").remote_field.through
+    rows = (
+        subscriptions.objects.filter(to_user=OuterRef("pk"))
+        .order_by()
+        .values("to_user")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    User.objects.update(subscribers_count=Coalesce(Subquery(rows), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0004_post_likes_count_post_comments_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="subscribers_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_subscribers_count, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="FeedItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_items",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_items",
+                        to="user.post",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at", "-post"),
+                "indexes": [
+                    models.Index(
+                        fields=["owner", "-created_at", "-post"],
+                        name="feed_item_owner_created_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("owner", "post"), name="unique_feed_item"
+                    )
+                ],
+            },
+        ),
+    ]
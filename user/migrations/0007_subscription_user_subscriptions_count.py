@@ -0,0 +1,114 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_subscriptions_count(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    Subscription = apps.get_model("user", "Subscription")
+    rows = (
+        Subscription.objects.filter(from_user=OuterRef("pk"))
+        .order_by()
+        .values("from_user")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    User.objects.update(subscriptions_count=Coalesce(Subquery(rows), 0))
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("user", "0006_like_post_indexes"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="Subscription",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "from_user",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="+",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                        (
+                            "to_user",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="+",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "user_user_subscriptions",
+                        "unique_together": {("from_user", "to_user")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="user",
+                    name="subscriptions",
+                    field=models.ManyToManyField(
+                        blank=True,
+                        related_name="subscribers",
+                        through="user.Subscription",
+                        through_fields=("from_user", "to_user"),
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name="subscription",
+            index=models.Index(
+                fields=["to_user", "from_user"], name="subscription_to_from_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subscription",
+            name="from_user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subscription",
+            name="to_user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="subscriptions_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_subscriptions_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:40
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0010_user_trigram_indexes"),
+    ]
+
+    operations = [
+        # Existing likes keep NULL, their time is unknown
+        migrations.AddField(
+            model_name="like",
+            name="created_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="like",
+            name="created_at",
+            field=models.DateTimeField(
+                db_default=django.db.models.functions.datetime.Now(),
+                editable=False,
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0011_like_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="image_renditions",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="photo_renditions",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
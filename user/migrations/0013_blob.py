@@ -0,0 +1,63 @@
+# Generated by Django 5.2.10 on 2026-10-18 14:40
+
+from collections import Counter
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    Blob = apps.get_model("user", "Blob")
+    references = Counter()
+    for model, field in (("Post", "image"), ("User", "photo")):
+        rows = apps.get_model("user", model).objects.values_list(
+            f"{field}_renditions", flat=True
+        )
+        for renditions in rows.iterator():
+            if not renditions.get("source"):
+                continue
+            references[renditions["source"]] += 1
+            for formats in renditions.get("files", {}).values():
+                references.update(formats.values())
+    Blob.objects.bulk_create(
+        [Blob(name=name, refcount=count) for name, count in references.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0012_image_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, primary_key=True, serialize=False
+                    ),
+                ),
+                ("refcount", models.PositiveIntegerField(default=0)),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        db_default=django.db.models.functions.datetime.Now()
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("refcount", 0)),
+                        fields=["updated_at"],
+                        name="blob_unreferenced_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.10 on 2026-10-18 15:05
+
+import django.db.models.deletion
+import user.image_utils
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0013_blob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduledPost",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("content", models.TextField()),
+                (
+                    "image",
+                    models.ImageField(
+                        blank=True,
+                        null=True,
+                        upload_to=user.image_utils.upload_post_image,
+                    ),
+                ),
+                ("publish_at", models.DateTimeField()),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scheduled_posts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "tags",
+                    models.ManyToManyField(
+                        blank=True, related_name="scheduled_posts", to="user.tag"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("publish_at", "id"),
+                "indexes": [
+                    models.Index(
+                        fields=["publish_at", "id"], name="scheduled_post_publish_idx"
+                    )
+                ],
+            },
+        ),
+    ]
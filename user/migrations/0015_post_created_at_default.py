@@ -0,0 +1,21 @@
+# Generated by Django 5.2.10 on 2026-10-18 15:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0014_scheduledpost"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
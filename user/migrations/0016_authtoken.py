@@ -0,0 +1,89 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:10
+
+import hashlib
+from datetime import timedelta
+
+import django.db.models.deletion
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def hash_existing_tokens(apps, schema_editor):
+    """Keep issued tokens working, but drop their plaintext keys"""
+    Token = apps.get_model("authtoken", "Token")
+    AuthToken = apps.get_model("user", "AuthToken")
+    expires_at = timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+    AuthToken.objects.bulk_create(
+        [
+            AuthToken(
+                digest=hashlib.sha256(key.encode()).hexdigest(),
+                user_id=user_id,
+                expires_at=expires_at,
+            )
+            for key, user_id in Token.objects.values_list("key", "user_id")
+        ],
+        batch_size=1000,
+    )
+    Token.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authtoken", "0004_alter_tokenproxy_options"),
+        ("user", "0015_post_created_at_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(editable=False, max_length=64)),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_default=django.db.models.functions.datetime.Now(),
+                        editable=False,
+                    ),
+                ),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="auth_tokens",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+                "indexes": [
+                    models.Index(
+                        fields=["expires_at"], name="auth_token_expires_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("digest",),
+                        include=("id", "user", "expires_at"),
+                        name="unique_auth_token_digest",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            hash_existing_tokens, migrations.RunPython.noop
+        ),
+    ]
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import copy
+
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Now, Upper
+from django.utils import timezone
 
 from Social_Media_API import settings
 from user.image_utils import upload_user_photo, upload_post_image
@@ -47,29 +53,150 @@ class UserManager(BaseUserManager):
         return self._create_user(email, password, **extra_fields)
 
 
-class User(AbstractUser):
+class ChangeTrackingMixin:
+    """
+    Remembers the values a row was loaded or last saved with. Fields
+    listed in task_fields are written only by background tasks, so an
+    ordinary save leaves them alone instead of writing a stale copy
+    """
+
+    task_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values) -> models.Model:
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs) -> None:
+        if (
+            self.task_fields
+            and not self._state.adding
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.task_fields
+                and field.attname in self.__dict__
+            ]
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        # Copies, so files and JSON changed in place still count
+        self._loaded_values = {
+            **getattr(self, "_loaded_values", {}),
+            **{
+                field.attname: copy.copy(self.__dict__[field.attname])
+                for field in self._meta.concrete_fields
+                if field.attname in self.__dict__ and (
+                    update_fields is None or field.name in update_fields
+                )
+            },
+        }
+
+    def changed_fields(self) -> set[str]:
+        """
+        Fields set to another value than the one last loaded or saved.
+        Before the save of an unsaved instance every field has changed
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return {field.name for field in self._meta.concrete_fields}
+        return {
+            field.name
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__ and (
+                field.attname not in loaded
+                or loaded[field.attname] != self.__dict__[field.attname]
+            )
+        }
+
+    def saved_value(self, field: str):
+        """Value of a field when last loaded or saved, None if unknown"""
+        attname = self._meta.get_field(field).attname
+        return getattr(self, "_loaded_values", {}).get(attname)
+
+
+class User(ChangeTrackingMixin, AbstractUser):
     username = None
     email = models.EmailField("email address", unique=True)
     photo = models.ImageField(
         null=True, blank=True, upload_to=upload_user_photo
     )
+    photo_renditions = models.JSONField(default=dict, editable=False)
     bio = models.TextField(null=True, blank=True)
     subscriptions = models.ManyToManyField(
         "self",
         symmetrical=False,
+        through="Subscription",
+        through_fields=("from_user", "to_user"),
         related_name="subscribers",
         blank=True
     )
+    subscriptions_count = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0, editable=False
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     objects = UserManager()
 
+    task_fields = ("photo_renditions",)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            GinIndex(
+                OpClass(Upper("email"), name="gin_trgm_ops"),
+                name="user_email_trgm_idx"
+            ),
+            GinIndex(
+                OpClass(Upper("first_name"), name="gin_trgm_ops"),
+                name="user_first_name_trgm_idx"
+            ),
+            GinIndex(
+                OpClass(Upper("last_name"), name="gin_trgm_ops"),
+                name="user_last_name_trgm_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.email
 
 
+class Subscription(models.Model):
+    from_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False
+    )
+    to_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False
+    )
+
+    def __str__(self) -> str:
+        return f"{self.from_user.email} subscribed to {self.to_user.email}"
+
+    class Meta:
+        db_table = "user_user_subscriptions"
+        unique_together = ("from_user", "to_user")
+        indexes = (
+            models.Index(
+                fields=("to_user", "from_user"),
+                name="subscription_to_from_idx"
+            ),
+        )
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=255, unique=True)
 
@@ -80,28 +207,112 @@ class Tag(models.Model):
         ordering = ("name",)
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    def update_search_vector(self) -> int:
+        """Recompute the stored full-text document, title above content"""
+        return self.update(
+            search_vector=(
+                SearchVector(
+                    "title", weight="A", config=settings.POST_SEARCH_CONFIG
+                )
+                + SearchVector(
+                    "content", weight="B", config=settings.POST_SEARCH_CONFIG
+                )
+            )
+        )
+
+
+class Post(ChangeTrackingMixin, models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     image = models.ImageField(
         null=True, blank=True, upload_to=upload_post_image
     )
+    image_renditions = models.JSONField(default=dict, editable=False)
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="posts"
     )
     likes = models.ManyToManyField(
-        settings.AUTH_USER_MODEL, related_name="liked_posts", blank=True
+        settings.AUTH_USER_MODEL,
+        through="Like",
+        related_name="liked_posts",
+        blank=True
     )
     tags = models.ManyToManyField(Tag, related_name="posts", blank=True)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    task_fields = ("image_renditions",)
 
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs) -> None:
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"title", "content"} & set(update_fields):
+            Post.objects.filter(pk=self.pk).update_search_vector()
+
     class Meta:
-        ordering = ("title",)
+        ordering = ("-created_at", "-id")
+        indexes = (
+            models.Index(
+                fields=("author", "-created_at", "-id"),
+                name="post_author_created_idx"
+            ),
+            models.Index(
+                fields=("-created_at", "-id"),
+                name="post_created_idx"
+            ),
+            GinIndex(
+                fields=("search_vector",),
+                name="post_search_vector_idx"
+            ),
+        )
+
+
+class Like(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False
+    )
+    created_at = models.DateTimeField(
+        null=True, editable=False, db_default=Now()
+    )
+
+    def __str__(self) -> str:
+        return f"{self.user.email} liked {self.post.title}"
+
+    class Meta:
+        db_table = "user_post_likes"
+        unique_together = ("post", "user")
+        indexes = (
+            models.Index(
+                fields=("user", "post"),
+                name="like_user_post_idx"
+            ),
+        )
+
+
+class CommentQuerySet(models.QuerySet):
+    def delete(self) -> tuple[int, dict[str, int]]:
+        """Recount the posts of deleted comments once, not once per row"""
+        from user.counters import recount_posts
+
+        post_ids = list(
+            self.order_by().values_list("post_id", flat=True).distinct()
+        )
+        deleted = super().delete()
+        if post_ids:
+            transaction.on_commit(lambda: recount_posts(post_ids))
+        return deleted
 
 
 class Comment(models.Model):
@@ -116,11 +327,134 @@ class Comment(models.Model):
         Post, on_delete=models.CASCADE, related_name="comments"
     )
 
+    objects = CommentQuerySet.as_manager()
+
     def __str__(self) -> str:
         return (
             f"{self.commentator.email} commented "
             f"on {self.post.title} at {self.created_at}."
         )
 
+    class Meta:
+        ordering = ("-created_at", "-id")
+        indexes = (
+            models.Index(
+                fields=("post", "-created_at", "-id"),
+                name="comment_post_created_idx"
+            ),
+        )
+
+
+class FeedItem(models.Model):
+    """A post pushed into the home feed of one of its author's subscribers"""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="feed_items"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="feed_items"
+    )
+    created_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.post.title} in the feed of {self.owner.email}"
+
+    class Meta:
+        ordering = ("-created_at", "-post")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("owner", "post"), name="unique_feed_item"
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("owner", "-created_at", "-post"),
+                name="feed_item_owner_created_idx"
+            ),
+        )
+
+
+class ScheduledPost(models.Model):
+    """A post waiting for its publication time"""
+
+    title = models.CharField(max_length=255)
+    content = models.TextField()
+    image = models.ImageField(
+        null=True, blank=True, upload_to=upload_post_image
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="scheduled_posts"
+    )
+    tags = models.ManyToManyField(
+        Tag, related_name="scheduled_posts", blank=True
+    )
+    publish_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.title} at {self.publish_at}"
+
+    class Meta:
+        ordering = ("publish_at", "id")
+        indexes = (
+            models.Index(
+                fields=("publish_at", "id"),
+                name="scheduled_post_publish_idx"
+            ),
+        )
+
+
+class Blob(models.Model):
+    """A stored file and the number of rows that refer to it"""
+
+    name = models.CharField(max_length=255, primary_key=True)
+    refcount = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(db_default=Now())
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.refcount})"
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=("updated_at",),
+                condition=models.Q(refcount=0),
+                name="blob_unreferenced_idx"
+            ),
+        )
+
+
+class AuthToken(models.Model):
+    """An API token, stored only as the SHA-256 digest of its key"""
+
+    digest = models.CharField(max_length=64, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="auth_tokens"
+    )
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+    expires_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"Token of {self.user.email} until {self.expires_at}"
+
     class Meta:
         ordering = ("-created_at",)
+        constraints = (
+            # Covers the authentication lookup, answered from the index
+            models.UniqueConstraint(
+                fields=("digest",),
+                include=("id", "user", "expires_at"),
+                name="unique_auth_token_digest"
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=("expires_at",),
+                name="auth_token_expires_idx"
+            ),
+        )
@@ -1,7 +1,342 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """Read the planner's row estimate instead of running COUNT(*)"""
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def aestimate_count(queryset: QuerySet) -> int:
+    plan = json.loads(await queryset.order_by().aexplain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class ListPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view=None
+    ) -> list | None:
+        """Count and read the page with the async ORM"""
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return self.page.object_list
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination over a unique ordering with opaque cursors,
+    so any page costs the same index range scan as the first one
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view) -> tuple[str, ...]:
+        return tuple(getattr(view, "keyset_ordering", self.ordering))
+
+    def get_count(self, queryset: QuerySet, request: Request) -> int | None:
+        mode = request.query_params.get(self.count_query_param)
+        if mode == "exact":
+            return queryset.count()
+        if mode == "estimated":
+            return estimate_count(queryset)
+        return None
+
+    def seek(self, values: list, reverse: bool) -> Q:
+        """Build a filter for rows placed after `values` in the ordering"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def position(self, row) -> list:
+        return [getattr(row, field.lstrip("-")) for field in self.ordering]
+
+    def encode_cursor(self, values: list, reverse: bool) -> str:
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+        payload = json.dumps({"v": values, "r": reverse})
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    @staticmethod
+    def coerce(value, field=None):
+        """Check a cursor value against its column, annotations are ranks"""
+        if field is not None:
+            return field.clean(value, None)
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError(value)
+        return value
+
+    def decode_cursor(self, request: Request, model) -> tuple | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = payload["v"]
+            reverse = bool(payload["r"])
+            if len(values) != len(self.ordering):
+                raise ValueError(values)
+            fields = {field.name: field for field in model._meta.fields}
+            fields["pk"] = model._meta.pk
+            values = [
+                self.coerce(value, fields.get(name))
+                for name, value in zip(
+                    (field.lstrip("-") for field in self.ordering), values
+                )
+            ]
+        except (
+            TypeError, ValueError, KeyError, binascii.Error, ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    async def aget_count(
+        self,
+        queryset: QuerySet,
+        request: Request
+    ) -> int | None:
+        mode = request.query_params.get(self.count_query_param)
+        if mode == "exact":
+            return await queryset.acount()
+        if mode == "estimated":
+            return await aestimate_count(queryset)
+        return None
+
+    def get_window(
+        self,
+        request: Request,
+        model,
+        view=None
+    ) -> tuple[int, tuple | None]:
+        """Rows and cursor the requested page needs, before reading it"""
+        self.ordering = self.get_ordering(view)
+        return self.get_page_size(request) + 1, self.decode_cursor(
+            request, model
+        )
+
+    def page_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view=None
+    ) -> QuerySet:
+        """Return the rows of the requested page and one row past it"""
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(view)
+        self.limit = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request, queryset.model)
+
+        self.reverse = False
+        queryset = queryset.order_by(*self.ordering)
+        if self.cursor is not None:
+            values, self.reverse = self.cursor
+            queryset = queryset.filter(self.seek(values, self.reverse))
+        if self.reverse:
+            queryset = queryset.reverse()
+        return queryset[:self.limit + 1]
+
+    def set_page(self, rows: list) -> list:
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if self.reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = self.cursor is not None and (
+            has_more or not self.reverse
+        )
+        self.page = rows
+        return rows
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view=None
+    ) -> list:
+        rows = self.page_queryset(queryset, request, view)
+        self.count = self.get_count(queryset, request)
+        return self.set_page(list(rows))
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        request: Request,
+        view=None
+    ) -> list:
+        rows = self.page_queryset(queryset, request, view)
+        self.count = await self.aget_count(queryset, request)
+        return self.set_page([row async for row in rows])
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.position(self.page[-1]), False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.position(self.page[0]), True)
+
+    def get_paginated_response(self, data: list) -> Response:
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {
+                    "type": "integer",
+                    "example": 123,
+                    "description": "Only present when `count` is requested",
+                },
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                    "example": f"http://api.example.org/accounts/"
+                               f"?{self.cursor_query_param}=eyJ2IjpbXX0=",
+                },
+                "previous": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                    "example": f"http://api.example.org/accounts/"
+                               f"?{self.cursor_query_param}=eyJ2IjpbXX0=",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view) -> list[dict]:
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include an `exact` or `estimated` "
+                               "total number of results.",
+                "schema": {"type": "string", "enum": ["exact", "estimated"]},
+            },
+        ]
+
+
+class PaginationModeMixin:
+    """Let a request choose between page number and keyset pagination"""
+
+    pagination_modes = {
+        "page": ListPagination,
+        "cursor": KeysetPagination,
+    }
+    pagination_mode_query_param = "pagination"
+
+    def get_pagination_class(self):
+        request = getattr(self, "request", None)
+        if request is None:
+            return self.pagination_class
+        mode = request.query_params.get(self.pagination_mode_query_param)
+        if mode is None and KeysetPagination.cursor_query_param in (
+            request.query_params
+        ):
+            mode = "cursor"
+        return self.pagination_modes.get(mode, self.pagination_class)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            pagination_class = self.get_pagination_class()
+            self._paginator = (
+                None if pagination_class is None else pagination_class()
+            )
+        return self._paginator
+
+    async def apaginate_queryset(self, queryset: QuerySet) -> list | None:
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
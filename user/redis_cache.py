@@ -0,0 +1,128 @@
+import asyncio
+import weakref
+
+import redis.asyncio
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+
+
+class AsyncRedisCache(RedisCache):
+    """
+    Redis cache whose async methods use redis.asyncio instead of running
+    the blocking client in a thread. Keys and values are encoded the
+    same way on both sides, so sync and async callers share entries
+    """
+
+    def __init__(self, server, params) -> None:
+        super().__init__(server, params)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def get_async_client(self) -> redis.asyncio.Redis:
+        """Connections belong to an event loop, so each loop gets its own"""
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            client = redis.asyncio.Redis.from_url(self._servers[0])
+            self._async_clients[loop] = (
+                client, loop.create_task(self.close_with_loop(loop, client))
+            )
+        return self._async_clients[loop][0]
+
+    async def close_with_loop(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        client: redis.asyncio.Redis
+    ) -> None:
+        """
+        Wait until the loop cancels its remaining tasks on shutdown, as
+        asyncio.run does. async_to_sync runs every call on a new loop
+        outside ASGI, whose connections would otherwise never be closed
+        """
+        try:
+            await loop.create_future()
+        finally:
+            self._async_clients.pop(loop, None)
+            await client.aclose()
+
+    def dumps(self, value) -> bytes:
+        return self._cache._serializer.dumps(value)
+
+    def loads(self, value: bytes):
+        return self._cache._serializer.loads(value)
+
+    async def aadd(
+        self,
+        key,
+        value,
+        timeout=DEFAULT_TIMEOUT,
+        version=None
+    ) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        client = self.get_async_client()
+        if timeout == 0:
+            return bool(
+                await client.set(key, self.dumps(value), nx=True)
+                and await client.delete(key)
+            )
+        return bool(
+            await client.set(key, self.dumps(value), ex=timeout, nx=True)
+        )
+
+    async def aget(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = await self.get_async_client().get(key)
+        return default if value is None else self.loads(value)
+
+    async def aset(
+        self,
+        key,
+        value,
+        timeout=DEFAULT_TIMEOUT,
+        version=None
+    ) -> None:
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        client = self.get_async_client()
+        if timeout == 0:
+            await client.delete(key)
+        else:
+            await client.set(key, self.dumps(value), ex=timeout)
+
+    async def adelete(self, key, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        return bool(await self.get_async_client().delete(key))
+
+    async def aget_many(self, keys, version=None) -> dict:
+        keys = {
+            self.make_and_validate_key(key, version=version): key
+            for key in keys
+        }
+        if not keys:
+            return {}
+        values = await self.get_async_client().mget(list(keys))
+        return {
+            keys[key]: self.loads(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    async def aset_many(
+        self,
+        data: dict,
+        timeout=DEFAULT_TIMEOUT,
+        version=None
+    ) -> list:
+        if not data:
+            return []
+        data = {
+            self.make_and_validate_key(key, version=version): self.dumps(value)
+            for key, value in data.items()
+        }
+        timeout = self.get_backend_timeout(timeout)
+        async with self.get_async_client().pipeline() as pipeline:
+            pipeline.mset(data)
+            if timeout is not None:
+                for key in data:
+                    pipeline.expire(key, timeout)
+            await pipeline.execute()
+        return []
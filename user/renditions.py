@@ -0,0 +1,103 @@
+import logging
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Model, Q
+from PIL import Image
+
+from user import blobs
+from user.image_utils import render
+
+logger = logging.getLogger(__name__)
+
+
+def needs_renditions(instance: Model, field: str) -> bool:
+    """Whether the renditions were made from another file than the field's"""
+    file = getattr(instance, field)
+    renditions = getattr(instance, f"{field}_renditions") or {}
+    return renditions.get("source") != (file.name or None)
+
+
+def renditions_of(instance: Model, field: str) -> dict:
+    """Stored renditions, or nothing if they were made from another file"""
+    file = getattr(instance, field)
+    renditions = getattr(instance, f"{field}_renditions") or {}
+    if not file or renditions.get("source") != file.name:
+        return {}
+    return renditions["files"]
+
+
+def process_renditions(
+    model: type[Model],
+    pk: int,
+    field: str,
+    force: bool = False
+) -> bool:
+    """
+    Render the current file of an image field and store the renditions,
+    unless the file was replaced while they were being made. The row
+    holds a blob reference for every rendition, the one for the source
+    is taken when the field is saved
+    """
+    renditions_field = f"{field}_renditions"
+    instance = model.objects.filter(pk=pk).only(
+        field, renditions_field
+    ).first()
+    if instance is None:
+        return False
+    if not force and not needs_renditions(instance, field):
+        return False
+
+    file = getattr(instance, field)
+    renditions = {}
+    current = Q(**{f"{field}__isnull": True}) | Q(**{field: ""})
+    if file:
+        try:
+            files = render(file)
+        except (OSError, Image.DecompressionBombError):
+            logger.exception("Cannot make renditions of %s", file.name)
+            files = {}
+        renditions = {"source": file.name, "files": files}
+        current = Q(**{field: file.name})
+
+    with transaction.atomic():
+        locked = (
+            model.objects
+            .select_for_update()
+            .filter(current, pk=pk)
+            .only(renditions_field)
+            .first()
+        )
+        if locked is None:
+            blobs.abandon(blobs.referenced(renditions))
+            return False
+        model.objects.filter(pk=pk).update(**{renditions_field: renditions})
+        blobs.retain(blobs.referenced(renditions))
+        blobs.release(blobs.referenced(getattr(locked, renditions_field)))
+    return True
+
+
+def retain_source(
+    instance: Model,
+    field: str,
+    update_fields: Iterable[str] | None = None
+) -> None:
+    """Move the blob reference of a saved row to its current file"""
+    if update_fields is not None and field not in update_fields:
+        return
+    if field not in instance.changed_fields():
+        return
+    previous = instance.saved_value(field)
+    previous = getattr(previous, "name", previous)
+    current = getattr(instance, field).name
+    if current:
+        blobs.retain([current])
+    if previous:
+        blobs.release([previous])
+
+
+def release_renditions(instance: Model, field: str) -> None:
+    """Drop the blob references of a deleted row"""
+    renditions = getattr(instance, f"{field}_renditions") or {}
+    file = getattr(instance, field)
+    blobs.release(([file.name] if file else []) + blobs.referenced(renditions))
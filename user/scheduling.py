@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from user import blobs
+from user.models import Post, ScheduledPost
+from user.tagging import PostTag
+
+
+def publish(claimed: QuerySet[ScheduledPost]) -> list[Post]:
+    """
+    Turn scheduled posts into posts dated at their publication time.
+    Rows are locked with SKIP LOCKED and deleted in the caller's
+    transaction, so concurrent publishers split the work, a retry finds
+    nothing left to do, and each post appears once
+    """
+    due = list(claimed)
+    if not due:
+        return []
+
+    posts = Post.objects.bulk_create(
+        Post(
+            title=scheduled.title,
+            content=scheduled.content,
+            image=scheduled.image,
+            image_renditions=(
+                {"source": scheduled.image.name, "files": {}}
+                if scheduled.image else {}
+            ),
+            author_id=scheduled.author_id,
+            created_at=scheduled.publish_at,
+        )
+        for scheduled in due
+    )
+    published = {scheduled.pk: post for scheduled, post in zip(due, posts)}
+    links = ScheduledPost.tags.through.objects.filter(
+        scheduledpost_id__in=published
+    ).values_list("scheduledpost_id", "tag_id")
+    PostTag.objects.bulk_create(
+        PostTag(post_id=published[scheduled_id].pk, tag_id=tag_id)
+        for scheduled_id, tag_id in links
+    )
+    Post.objects.filter(
+        pk__in=[post.pk for post in posts]
+    ).update_search_vector()
+    blobs.retain(post.image.name for post in posts if post.image)
+    ScheduledPost.objects.filter(pk__in=published).delete()
+    return posts
+
+
+def publish_due(batch_size: int = None) -> list[Post]:
+    """Publish one batch of due scheduled posts, oldest first"""
+    batch_size = batch_size or settings.SCHEDULED_POST_BATCH_SIZE
+    with transaction.atomic():
+        return publish(
+            ScheduledPost.objects
+            .select_for_update(skip_locked=True)
+            .filter(publish_at__lte=timezone.now())
+            .order_by("publish_at", "id")[:batch_size]
+        )
+
+
+def publish_one(scheduled_post_id: int) -> Post | None:
+    """Publish one scheduled post, or nothing if it is already gone"""
+    with transaction.atomic():
+        posts = publish(
+            ScheduledPost.objects
+            .select_for_update(skip_locked=True)
+            .filter(pk=scheduled_post_id)
+        )
+    return posts[0] if posts else None
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, Q, QuerySet, Value, When
+from django.db.models.functions import Greatest, Upper
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+QUERY_CANCELED = "57014"
+
+
+class SearchTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Search took too long, try a more specific query."
+    default_code = "search_timeout"
+
+
+def prefix_match(term: str) -> Q:
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f"{field}__istartswith": term})
+    return condition
+
+
+def fuzzy_match(term: str) -> Q:
+    """Match a term against any word of the searched fields"""
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(TrigramWordSimilar(Upper(field), Value(term.upper())))
+    return condition
+
+
+def autocomplete(queryset: QuerySet, term: str, limit: int = None) -> list:
+    """
+    Rank users by prefix match first and word similarity second,
+    both served by the trigram indexes on upper-cased fields
+    """
+    term = term.strip()
+    if len(term) < settings.USER_SEARCH_MIN_LENGTH:
+        return []
+    limit = limit or settings.USER_SEARCH_LIMIT
+    similarity = Greatest(*(
+        TrigramWordSimilarity(Value(term.upper()), Upper(field))
+        for field in SEARCH_FIELDS
+    ))
+    queryset = (
+        queryset
+        .filter(prefix_match(term) | fuzzy_match(term))
+        .annotate(
+            prefix=Case(
+                When(prefix_match(term), then=Value(1)),
+                default=Value(0)
+            ),
+            similarity=similarity,
+        )
+        .order_by("-prefix", "-similarity", "id")
+    )[:limit]
+
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('statement_timeout', %s, true)",
+                    [f"{settings.USER_SEARCH_TIMEOUT}ms"]
+                )
+            return list(queryset)
+    except OperationalError as error:
+        # psycopg reports the SQLSTATE as sqlstate, psycopg2 as pgcode
+        code = getattr(error.__cause__, "sqlstate", None) or getattr(
+            error.__cause__, "pgcode", None
+        )
+        if code != QUERY_CANCELED:
+            raise
+        raise SearchTimeout()
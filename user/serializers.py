@@ -1,7 +1,71 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model, authenticate
+from django.db.models import BigIntegerField
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from PIL import Image
 from rest_framework import serializers
 
-from user.models import User, Tag, Post, Comment
+from user.models import User, Tag, Post, Comment, ScheduledPost
+from user.renditions import renditions_of
+from user.uploads import read_image_header
+
+
+class UploadedImageField(serializers.ImageField):
+    """
+    Accepts an image after reading only its header, so no upload is
+    decoded or verified pixel by pixel in the request thread
+    """
+
+    default_error_messages = {
+        "too_large": "Image files must not exceed {max_size} bytes.",
+        "too_many_pixels": "Images must not exceed {max_pixels} pixels.",
+    }
+
+    def to_internal_value(self, data):
+        file_object = serializers.FileField.to_internal_value(self, data)
+        if file_object.size > settings.UPLOAD_MAX_SIZE:
+            self.fail("too_large", max_size=settings.UPLOAD_MAX_SIZE)
+        try:
+            image = read_image_header(file_object)
+        except Image.DecompressionBombError:
+            self.fail(
+                "too_many_pixels", max_pixels=settings.IMAGE_MAX_PIXELS
+            )
+        except (OSError, SyntaxError, ValueError):
+            # Pillow reports unreadable headers as OSError, some of its
+            # plugins as SyntaxError or ValueError
+            self.fail("invalid_image")
+        if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+            self.fail(
+                "too_many_pixels", max_pixels=settings.IMAGE_MAX_PIXELS
+            )
+        file_object.content_type = Image.MIME[image.format]
+        return file_object
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class RenditionsField(serializers.Field):
+    """URLs of the resized copies of an image, by size and format"""
+
+    def __init__(self, image_field: str, **kwargs) -> None:
+        self.image_field = image_field
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance) -> dict:
+        request = self.context.get("request")
+        storage = getattr(instance, self.image_field).storage
+        urls = {}
+        for name, formats in renditions_of(instance, self.image_field).items():
+            urls[name] = {}
+            for image_format, path in formats.items():
+                url = storage.url(path)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[name][image_format] = url
+        return urls
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -72,16 +136,14 @@ class UserListSerializer(serializers.ModelSerializer):
 
 
 class UserDetailSerializer(serializers.ModelSerializer):
-    subscriptions = serializers.SlugRelatedField(
-        many=True,
-        read_only=True,
-        slug_field="email"
+    number_of_subscriptions = serializers.IntegerField(
+        source="subscriptions_count", read_only=True
     )
-    subscribers = serializers.SlugRelatedField(
-        many=True,
-        read_only=True,
-        slug_field="email"
+    number_of_subscribers = serializers.IntegerField(
+        source="subscribers_count", read_only=True
     )
+    photo = UploadedImageField(required=False, allow_null=True)
+    photo_renditions = RenditionsField("photo")
 
     class Meta:
         model = get_user_model()
@@ -95,16 +157,15 @@ class UserDetailSerializer(serializers.ModelSerializer):
             "last_login",
             "is_staff",
             "photo",
+            "photo_renditions",
             "bio",
-            "subscriptions",
-            "subscribers",
+            "number_of_subscriptions",
+            "number_of_subscribers",
         )
         read_only_fields = (
             "is_staff",
             "date_joined",
             "last_login",
-            "subscriptions",
-            "subscribers",
         )
         extra_kwargs = {
             "password": {
@@ -116,14 +177,13 @@ class UserDetailSerializer(serializers.ModelSerializer):
     def update(self, instance: User, validated_data: dict) -> User:
         """Update a user, set the password correctly and return it"""
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
         if password:
-            user.set_password(password)
-            user.save()
-        return user
+            instance.set_password(password)
+        return super().update(instance, validated_data)
 
 
 class PostCreateUpdateSerializer(serializers.ModelSerializer):
+    image = UploadedImageField(required=False, allow_null=True)
     tags = serializers.SlugRelatedField(
         many=True,
         queryset=Tag.objects.all(),
@@ -142,8 +202,25 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
         )
 
 
-class PostCreateScheduleSerializer(PostCreateUpdateSerializer):
-    created_at = serializers.DateTimeField()
+class PostCreateScheduleSerializer(serializers.ModelSerializer):
+    created_at = serializers.DateTimeField(source="publish_at")
+    image = UploadedImageField(required=False, allow_null=True)
+    tags = serializers.SlugRelatedField(
+        many=True,
+        queryset=Tag.objects.all(),
+        slug_field="name"
+    )
+
+    class Meta:
+        model = ScheduledPost
+        fields = (
+            "id",
+            "title",
+            "content",
+            "created_at",
+            "image",
+            "tags",
+        )
 
 
 class PostListSerializer(serializers.ModelSerializer):
@@ -152,8 +229,12 @@ class PostListSerializer(serializers.ModelSerializer):
         read_only=True,
     )
     number_of_likes = serializers.IntegerField(
-        source="likes.count", read_only=True
+        source="likes_count", read_only=True
     )
+    number_of_comments = serializers.IntegerField(
+        source="comments_count", read_only=True
+    )
+    image_renditions = RenditionsField("image")
     tags = serializers.SlugRelatedField(
         many=True,
         read_only=True,
@@ -168,12 +249,33 @@ class PostListSerializer(serializers.ModelSerializer):
             "content",
             "created_at",
             "image",
+            "image_renditions",
             "author",
             "number_of_likes",
+            "number_of_comments",
             "tags",
         )
 
 
+class TrendingPostSerializer(PostListSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ("score",)
+
+
+class TrendingTagSerializer(serializers.ModelSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Tag
+        fields = (
+            "id",
+            "name",
+            "score",
+        )
+
+
 class CommentSerializer(serializers.ModelSerializer):
     commentator = UserListSerializer(
         many=False,
@@ -205,12 +307,13 @@ class PostDetailSerializer(serializers.ModelSerializer):
         many=False,
         read_only=True,
     )
-    liked_by = serializers.SlugRelatedField(
-        many=True,
-        read_only=True,
-        source="likes",
-        slug_field="email"
+    number_of_likes = serializers.IntegerField(
+        source="likes_count", read_only=True
+    )
+    number_of_comments = serializers.IntegerField(
+        source="comments_count", read_only=True
     )
+    image_renditions = RenditionsField("image")
     tags = serializers.SlugRelatedField(
         many=True,
         read_only=True,
@@ -218,7 +321,8 @@ class PostDetailSerializer(serializers.ModelSerializer):
     )
     comments = CommentSerializer(
         many=True,
-        read_only=True
+        read_only=True,
+        source="latest_comments"
     )
 
     class Meta:
@@ -229,8 +333,49 @@ class PostDetailSerializer(serializers.ModelSerializer):
             "content",
             "created_at",
             "image",
+            "image_renditions",
             "author",
-            "liked_by",
+            "number_of_likes",
+            "number_of_comments",
             "tags",
             "comments"
         )
+
+
+class BulkIDsField(serializers.ListField):
+    """Primary keys of one bulk action, at most BULK_ACTION_LIMIT of them"""
+
+    def __init__(self, **kwargs) -> None:
+        kwargs.setdefault(
+            "child",
+            serializers.IntegerField(
+                min_value=1, max_value=BigIntegerField.MAX_BIGINT
+            )
+        )
+        kwargs.setdefault("default", list)
+        kwargs.setdefault("max_length", settings.BULK_ACTION_LIMIT)
+        super().__init__(**kwargs)
+
+
+class BulkLikeSerializer(serializers.Serializer):
+    like = BulkIDsField()
+    unlike = BulkIDsField()
+
+    def validate(self, attrs: dict) -> dict:
+        if set(attrs["like"]) & set(attrs["unlike"]):
+            raise serializers.ValidationError(
+                "A post cannot be liked and unliked at once"
+            )
+        return attrs
+
+
+class BulkSubscribeSerializer(serializers.Serializer):
+    subscribe = BulkIDsField()
+    unsubscribe = BulkIDsField()
+
+    def validate(self, attrs: dict) -> dict:
+        if set(attrs["subscribe"]) & set(attrs["unsubscribe"]):
+            raise serializers.ValidationError(
+                "A user cannot be subscribed and unsubscribed at once"
+            )
+        return attrs
@@ -0,0 +1,285 @@
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from user import authentication, blobs, cache, interactions
+from user.counters import (
+    change_comments_count,
+    recount_likes,
+    recount_posts,
+    recount_subscriptions,
+)
+from user.metrics import record_pool_stats
+from user.models import (
+    User,
+    Tag,
+    Post,
+    Comment,
+    Like,
+    Subscription,
+    ScheduledPost,
+    AuthToken,
+)
+from user.renditions import (
+    needs_renditions,
+    release_renditions,
+    retain_source,
+)
+from user.serializers import UserListSerializer
+from user.tasks import process_image, push_post_to_feeds
+
+
+request_finished.connect(record_pool_stats)
+
+
+def invalidate_on_commit(resource: str, pks) -> None:
+    pks = list(pks)
+    if pks:
+        transaction.on_commit(lambda: cache.invalidate(resource, pks))
+
+
+@receiver(post_save, sender=Post)
+def push_created_post_to_feeds(
+    sender,
+    instance: Post,
+    created: bool,
+    **kwargs
+) -> None:
+    if created:
+        transaction.on_commit(lambda: push_post_to_feeds.delay(instance.pk))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=User)
+def process_uploaded_image(sender, instance, update_fields, **kwargs) -> None:
+    field = "image" if sender is Post else "photo"
+    # The source is referenced before the task runs, so that collection
+    # cannot delete it while the renditions are pending
+    retain_source(instance, field, update_fields)
+    if needs_renditions(instance, field):
+        transaction.on_commit(
+            lambda: process_image.delay(
+                sender._meta.label, instance.pk, field
+            )
+        )
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=User)
+def release_deleted_image(sender, instance, **kwargs) -> None:
+    release_renditions(instance, "image" if sender is Post else "photo")
+
+
+@receiver(post_save, sender=ScheduledPost)
+def retain_scheduled_image(
+    sender,
+    instance: ScheduledPost,
+    created: bool,
+    **kwargs
+) -> None:
+    if created and instance.image:
+        blobs.retain([instance.image.name])
+
+
+@receiver(post_delete, sender=ScheduledPost)
+def release_scheduled_image(
+    sender,
+    instance: ScheduledPost,
+    **kwargs
+) -> None:
+    if instance.image:
+        blobs.release([instance.image.name])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance: Post, **kwargs) -> None:
+    invalidate_on_commit("post", [instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post(sender, instance: Comment, **kwargs) -> None:
+    invalidate_on_commit("post", [instance.post_id])
+
+
+@receiver(post_save, sender=Comment)
+def count_created_comment(
+    sender,
+    instance: Comment,
+    created: bool,
+    **kwargs
+) -> None:
+    if created:
+        change_comments_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def recount_deleted_comment(
+    sender,
+    instance: Comment,
+    origin=None,
+    **kwargs
+) -> None:
+    # Querysets of comments recount their posts once after deleting, and
+    # comments deleted along with their post or commentator are handled
+    # by those deletions. Origin is the instance or queryset deleted first
+    if isinstance(origin, Comment):
+        post_id = instance.post_id
+        transaction.on_commit(lambda: recount_posts([post_id]))
+
+
+@receiver(pre_delete, sender=User)
+def recount_after_user_deletion(sender, instance: User, **kwargs) -> None:
+    # Likes and comments of a user go in the same cascade without signals
+    # of their own reaching the counters, so their posts are recounted
+    post_ids = list(
+        {
+            *Like.objects.filter(user=instance).values_list(
+                "post_id", flat=True
+            ),
+            *Comment.objects.filter(commentator=instance).values_list(
+                "post_id", flat=True
+            ),
+        }
+    )
+    if post_ids:
+        transaction.on_commit(lambda: recount_posts(post_ids))
+        invalidate_on_commit("post", post_ids)
+
+    # So do subscriptions, on both sides
+    authors = list(
+        Subscription.objects.filter(from_user=instance).values_list(
+            "to_user_id", flat=True
+        )
+    )
+    subscribers = list(
+        Subscription.objects.filter(to_user=instance).values_list(
+            "from_user_id", flat=True
+        )
+    )
+    if authors or subscribers:
+        transaction.on_commit(
+            lambda: recount_subscribed_users(authors, subscribers)
+        )
+
+
+def recount_subscribed_users(
+    authors: list[int],
+    subscribers: list[int]
+) -> None:
+    recount_subscriptions([*authors, *subscribers])
+    cache.invalidate("user", [*authors, *subscribers])
+    interactions.resume_fan_out(authors)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def invalidate_tagged_posts(sender, instance: Tag, **kwargs) -> None:
+    invalidate_on_commit(
+        "post", instance.posts.values_list("pk", flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(m2m_changed, sender=Post.likes.through)
+def invalidate_post_relations(
+    sender,
+    instance,
+    action: str,
+    reverse: bool,
+    pk_set: set | None,
+    **kwargs
+) -> None:
+    if not reverse and action.startswith("post_"):
+        invalidate_on_commit("post", [instance.pk])
+    elif reverse and action in ("post_add", "post_remove"):
+        invalidate_on_commit("post", pk_set)
+    elif reverse and action == "pre_clear":
+        related = instance.posts if isinstance(instance, Tag) else (
+            instance.liked_posts
+        )
+        invalidate_on_commit("post", related.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def recount_changed_likes(
+    sender,
+    instance,
+    action: str,
+    reverse: bool,
+    pk_set: set | None,
+    **kwargs
+) -> None:
+    # Likes changed through the related managers, as the admin does, skip
+    # the counting statements of interactions
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        post_ids = [instance.pk]
+    elif reverse and action in ("post_add", "post_remove"):
+        post_ids = list(pk_set)
+    elif reverse and action == "pre_clear":
+        post_ids = list(instance.liked_posts.values_list("pk", flat=True))
+    else:
+        return
+    if post_ids:
+        transaction.on_commit(lambda: recount_likes(post_ids))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(
+    sender,
+    instance: User,
+    created: bool,
+    update_fields: frozenset | None,
+    **kwargs
+) -> None:
+    invalidate_on_commit("user", [instance.pk])
+    if created:
+        return
+    changed = instance.changed_fields()
+    if update_fields is not None:
+        changed &= update_fields
+    if changed - {"last_login"}:
+        # Cached credentials hold the user, so password changes and
+        # deactivation take effect at once
+        transaction.on_commit(
+            lambda: authentication.forget_users([instance.pk])
+        )
+    if changed & set(UserListSerializer.Meta.fields):
+        # Posts render their author with these fields
+        invalidate_on_commit(
+            "post", Post.objects.filter(author=instance).values_list(
+                "pk", flat=True
+            )
+        )
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance: User, **kwargs) -> None:
+    # Posts and tokens of the user go in the cascade with their own signals
+    invalidate_on_commit("user", [instance.pk])
+
+
+@receiver(post_delete, sender=AuthToken)
+def forget_deleted_token(sender, instance: AuthToken, **kwargs) -> None:
+    transaction.on_commit(
+        lambda: authentication.forget_tokens([instance.digest])
+    )
+
+
+@receiver(m2m_changed, sender=User.subscriptions.through)
+def invalidate_subscription_sides(
+    sender,
+    instance: User,
+    action: str,
+    pk_set: set | None,
+    **kwargs
+) -> None:
+    if action.startswith("post_"):
+        invalidate_on_commit("user", [instance.pk, *(pk_set or ())])
@@ -0,0 +1,66 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+BLOB_DIR = "blobs"
+BLOB_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def blob_name(digest: str, extension: str) -> str:
+    return os.path.join(
+        BLOB_DIR, digest[:2], digest[2:4], f"{digest}{extension.lower()}"
+    )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Saves every distinct content once, named after its SHA-256. The
+    requested name only contributes its extension. Bytes are hashed
+    while they are copied to a temporary file, which is then renamed
+    into place, so a blob is either complete or absent
+    """
+
+    def _save(self, name: str, content) -> str:
+        _, extension = os.path.splitext(name)
+        incoming = self.path(os.path.join(BLOB_DIR, "incoming"))
+        os.makedirs(incoming, exist_ok=True)
+
+        digest = hashlib.sha256()
+        descriptor, temporary = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    file.write(chunk)
+            name = blob_name(digest.hexdigest(), extension)
+            path = self.path(name)
+            if os.path.exists(path):
+                # Touch the blob so collection treats it as fresh
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(temporary, self.file_permissions_mode or 0o644)
+                os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return name
+
+
+def serve_blob(request: HttpRequest, path: str) -> HttpResponse:
+    """Blob names change with their content, so they are cached forever"""
+    response = serve(
+        request,
+        os.path.join(BLOB_DIR, path),
+        document_root=settings.MEDIA_ROOT
+    )
+    patch_cache_control(
+        response, public=True, max_age=BLOB_MAX_AGE, immutable=True
+    )
+    return response
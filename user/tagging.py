@@ -0,0 +1,50 @@
+from typing import Iterable
+
+from django.db.models import Count, Exists, OuterRef, QuerySet
+
+from user.models import Post, Tag
+
+TAG_MODES = ("any", "all")
+
+PostTag = Post.tags.through
+
+
+def filter_by_tags(
+    queryset: QuerySet[Post],
+    tag_ids: Iterable[int] = (),
+    tag_names: Iterable[str] = (),
+    mode: str = "any"
+) -> QuerySet[Post]:
+    """
+    Keep posts tagged with any or all of the given tags. Both modes
+    are semi-joins on the post-tag table, so no post is duplicated
+    """
+    tag_ids = set(tag_ids)
+    tag_names = set(tag_names)
+    if tag_names:
+        found = Tag.objects.filter(name__in=tag_names).values_list(
+            "pk", flat=True
+        )
+        found = set(found)
+        if mode == "all" and len(found) < len(tag_names):
+            return queryset.none()
+        tag_ids |= found
+    if not tag_ids:
+        return queryset.none()
+
+    if mode == "all":
+        tagged = (
+            PostTag.objects
+            .filter(tag_id__in=tag_ids)
+            .values("post_id")
+            .annotate(matched=Count("tag_id"))
+            .filter(matched=len(tag_ids))
+            .values("post_id")
+        )
+        return queryset.filter(pk__in=tagged)
+
+    return queryset.filter(
+        Exists(
+            PostTag.objects.filter(post_id=OuterRef("pk"), tag_id__in=tag_ids)
+        )
+    )
@@ -1,8 +1,69 @@
 from celery import shared_task
+from django.apps import apps
 
+from user import cache, feed, scheduling, tokens, trending
+from user.renditions import process_renditions
 from user.models import Post
 
 
 @shared_task
-def delayed_post(**kwargs) -> None:
-    Post.objects.create(**kwargs)
+def delayed_post(scheduled_post_id: int) -> None:
+    """Publish one scheduled post, a retry after success does nothing"""
+    post = scheduling.publish_one(scheduled_post_id)
+    if post is not None:
+        announce([post])
+
+
+@shared_task
+def push_post_to_feeds(post_id: int) -> None:
+    feed.fan_out_post(post_id)
+
+
+@shared_task
+def push_author_to_feed(user_id: int, author_id: int) -> None:
+    feed.follow(user_id, author_id)
+
+
+@shared_task
+def backfill_author_feeds(author_id: int) -> None:
+    feed.backfill(author_id)
+
+
+@shared_task
+def refresh_trending() -> None:
+    trending.refresh()
+
+
+@shared_task
+def process_image(
+    model_label: str,
+    pk: int,
+    field: str,
+    force: bool = False
+) -> None:
+    model = apps.get_model(model_label)
+    if process_renditions(model, pk, field, force):
+        cache.invalidate(model._meta.model_name, [pk])
+
+
+def announce(posts: list[Post]) -> None:
+    """Queue the work post_save would have queued for bulk-created posts"""
+    for post in posts:
+        push_post_to_feeds.delay(post.pk)
+        if post.image:
+            process_image.delay(Post._meta.label, post.pk, "image", True)
+
+
+@shared_task
+def publish_scheduled_posts() -> int:
+    """Publish every due scheduled post, batch by batch"""
+    published = 0
+    while posts := scheduling.publish_due():
+        announce(posts)
+        published += len(posts)
+    return published
+
+
+@shared_task
+def purge_expired_tokens() -> int:
+    return tokens.purge_expired()
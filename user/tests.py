@@ -1,3 +1,1234 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from user import (
+    authentication,
+    blobs,
+    cache as api_cache,
+    feed,
+    interactions,
+    tasks,
+    tokens,
+    trending,
+)
+from user.models import (
+    User,
+    Tag,
+    Post,
+    Like,
+    Comment,
+    Subscription,
+    FeedItem,
+    Blob,
+    ScheduledPost,
+    AuthToken,
+)
+from user.renditions import process_renditions
+from user.storage import ContentAddressedStorage
+from user.uploads import LimitedUploadHandler
+
+
+def create_user(email: str, **extra_fields) -> User:
+    return User.objects.create_user(email, "password", **extra_fields)
+
+
+def create_post(author: User, **extra_fields) -> Post:
+    extra_fields.setdefault("title", "Title")
+    extra_fields.setdefault("content", "Content")
+    return Post.objects.create(author=author, **extra_fields)
+
+
+def image_file(
+    size: tuple[int, int] = (200, 100),
+    image_format: str = "JPEG",
+    **save_options
+) -> BytesIO:
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, image_format, **save_options)
+    buffer.seek(0)
+    return buffer
+
+
+def cursor(values: list, reverse: bool = False) -> str:
+    payload = json.dumps({"v": values, "r": reverse}).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def walk(client: APIClient, url: str, link: str = "next") -> list[int]:
+    """Follow pagination links from `url` and collect the post IDs"""
+    ids = []
+    while url:
+        response = client.get(url)
+        ids.extend(post["id"] for post in response.data["results"])
+        url = response.data[link]
+    return ids
+
+
+class SeededPostsTestCase(TestCase):
+    """Enough analyzed rows for Postgres to plan like in production"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        start = timezone.now() - timedelta(days=30)
+        cls.users = User.objects.bulk_create(
+            [User(email=f"user{number}@example.com") for number in range(50)]
+        )
+        cls.user = cls.users[0]
+        cls.tags = Tag.objects.bulk_create(
+            [Tag(name=f"tag{number}") for number in range(20)]
+        )
+        posts = Post.objects.bulk_create(
+            [
+                Post(
+                    author=cls.users[number % 50],
+                    title="Title" if number % 1000 else "Summer holidays",
+                    content="Content",
+                    created_at=start + timedelta(minutes=number)
+                )
+                for number in range(5000)
+            ]
+        )
+        Post.objects.update_search_vector()
+        cls.post = posts[0]
+        Post.tags.through.objects.bulk_create(
+            [
+                Post.tags.through(post=post, tag=cls.tags[tag])
+                for number, post in enumerate(posts)
+                for tag in {number % 20, number * 7 % 20}
+            ]
+        )
+        Like.objects.bulk_create(
+            [
+                Like(user=user, post=posts[(number * 97 + offset) % 5000])
+                for number, user in enumerate(cls.users)
+                for offset in range(40)
+            ],
+            ignore_conflicts=True
+        )
+        Comment.objects.bulk_create(
+            [
+                Comment(
+                    commentator=cls.users[number % 50],
+                    post=posts[number % 100],
+                    content="Comment"
+                )
+                for number in range(5000)
+            ]
+        )
+        Subscription.objects.bulk_create(
+            [
+                Subscription(from_user=cls.user, to_user=user)
+                for user in cls.users[1:10]
+            ]
+        )
+        FeedItem.objects.bulk_create(
+            [
+                FeedItem(
+                    owner=user, post=post, created_at=post.created_at
+                )
+                for user in cls.users[:10]
+                for post in posts[::10]
+            ]
+        )
+
+    def setUp(self) -> None:
+        with connection.cursor() as cursor:
+            # Bulk updates wait in the GIN pending list, which the
+            # planner prices as a scan of every pending entry
+            cursor.execute(
+                "SELECT gin_clean_pending_list('post_search_vector_idx')"
+            )
+            cursor.execute("ANALYZE")
+
+
+class IndexPlanTests(SeededPostsTestCase):
+    """Common post reads use the indexes added for them"""
+
+    def assertUsesIndex(self, queryset, index: str) -> None:
+        self.assertIn(index, queryset.explain())
+
+    def test_list_reads_the_chronological_index(self) -> None:
+        self.assertUsesIndex(Post.objects.all()[:10], "post_created_idx")
+
+    def test_posts_of_an_author_read_the_author_index(self) -> None:
+        self.assertUsesIndex(
+            Post.objects.filter(author=self.user)[:10],
+            "post_author_created_idx"
+        )
+
+    def test_liked_posts_read_the_likes_of_the_user(self) -> None:
+        liked = Post.objects.filter(
+            Exists(Like.objects.filter(post_id=OuterRef("pk"), user=self.user))
+        )
+        self.assertUsesIndex(liked[:10], "like_user_post_idx")
+
+    def test_subscriptions_read_the_feed_index(self) -> None:
+        self.assertUsesIndex(
+            feed.feed_queryset(self.user, Post.objects.all(), limit=11),
+            "feed_item_owner_created_idx"
+        )
+
+    def test_comments_read_the_post_comment_index(self) -> None:
+        self.assertUsesIndex(
+            self.post.comments.all()[:10], "comment_post_created_idx"
+        )
+
+
+class PostQueryPlanTests(SeededPostsTestCase):
+    """Post reads keep their queries, stay on their indexes, never DISTINCT"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertPlan(
+        self,
+        url: str,
+        params: dict,
+        queries: int,
+        indexes: tuple[str, ...]
+    ) -> None:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(context), queries)
+
+        plans = []
+        for query in context.captured_queries:
+            self.assertNotIn("DISTINCT", query["sql"])
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN {query['sql']}")
+                plans.extend(row[0] for row in cursor.fetchall())
+        for index in indexes:
+            self.assertIn(index, "\n".join(plans))
+
+    def test_list_filters(self) -> None:
+        first, second, paired = (
+            self.tags[number].pk for number in (1, 2, 7)
+        )
+        cases = (
+            ({}, 3, ("post_created_idx",)),
+            ({"my": 1}, 3, ("post_author_created_idx",)),
+            ({"subscriptions": 1}, 3, ()),
+            (
+                {"subscriptions": 1, "pagination": "cursor"},
+                2,
+                ("feed_item_owner_created_idx",)
+            ),
+            ({"liked": 1}, 3, ("like_user_post_idx",)),
+            ({"tags": f"{first},{second}"}, 3, ("user_post_tags_",)),
+            (
+                {"tags": f"{first},{paired}", "tags_mode": "all"},
+                3,
+                ("user_post_tags_",)
+            ),
+            ({"q": "holidays"}, 3, ("post_search_vector_idx",)),
+            ({"pagination": "cursor"}, 2, ("post_created_idx",)),
+        )
+        for params, queries, indexes in cases:
+            with self.subTest(**params):
+                self.assertPlan(
+                    reverse("user:post-list"), params, queries, indexes
+                )
+
+    def test_next_cursor_page(self) -> None:
+        url = self.client.get(
+            reverse("user:post-list"), {"pagination": "cursor"}
+        ).data["next"]
+        self.assertPlan(url, {}, 2, ("post_created_idx",))
+
+    def test_retrieve(self) -> None:
+        self.assertPlan(
+            reverse("user:post-detail", args=[self.post.pk]),
+            {},
+            3,
+            ("user_post_pkey", "comment_post_created_idx")
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user("user@example.com")
+        created_at = timezone.now()
+        # Ties on created_at are broken by id
+        self.posts = [
+            create_post(self.user, created_at=created_at) for _ in range(5)
+        ]
+        self.expected = [post.pk for post in reversed(self.posts)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("user:post-list") + "?pagination=cursor"
+
+    def test_pages_cover_every_post_once(self) -> None:
+        self.assertEqual(
+            walk(self.client, self.url + "&page_size=2"), self.expected
+        )
+
+    def test_previous_links_lead_back(self) -> None:
+        response = self.client.get(self.url + "&page_size=2")
+        self.assertIsNone(response.data["previous"])
+        second = self.client.get(response.data["next"])
+        first = self.client.get(second.data["previous"])
+        self.assertEqual(first.data["results"], response.data["results"])
+        self.assertIsNone(first.data["previous"])
+
+    def test_count_is_only_added_on_request(self) -> None:
+        self.assertNotIn("count", self.client.get(self.url).data)
+        response = self.client.get(self.url + "&count=exact")
+        self.assertEqual(response.data["count"], 5)
+
+    def test_malformed_cursors_are_not_found(self) -> None:
+        for value in ("not-base64!", cursor([]), cursor(["yesterday", 1])):
+            response = self.client.get(
+                reverse("user:post-list"), {"cursor": value}
+            )
+            self.assertEqual(response.status_code, 404, value)
+
+
+class PostCommentsTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user("user@example.com")
+        self.post = create_post(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_search_query_does_not_change_comment_ordering(self) -> None:
+        comments = [
+            Comment.objects.create(
+                post=self.post, commentator=self.user, content=str(number)
+            )
+            for number in range(3)
+        ]
+
+        response = self.client.get(
+            reverse("user:post-comments", args=[self.post.pk]),
+            {"q": "content"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [comment["id"] for comment in response.data["results"]],
+            [comment.pk for comment in reversed(comments)]
+        )
+
+
+class PostSearchTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user("user@example.com")
+        create_post(self.user, title="Summer holidays")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_crafted_rank_cursors_are_not_found(self) -> None:
+        for values in (["abc", 1], ["NaN", 1], [0.5, 10 ** 20]):
+            response = self.client.get(
+                reverse("user:post-list"),
+                {"q": "holidays", "cursor": cursor(values)}
+            )
+            self.assertEqual(response.status_code, 404, values)
+
+
+class UserSearchTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(create_user("admin@example.com"))
+        self.url = reverse("user:user-list")
+
+    def search(self, term: str) -> list[str]:
+        response = self.client.get(self.url, {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [user["email"] for user in response.data]
+
+    def test_prefix_matches_rank_before_fuzzy_ones(self) -> None:
+        create_user("amy@example.com", last_name="Lebrown")
+        create_user("zed@example.com", last_name="Brownstone")
+        create_user("brown@example.com")
+
+        emails = self.search("brown")
+        self.assertEqual(
+            set(emails[:2]), {"zed@example.com", "brown@example.com"}
+        )
+        self.assertEqual(emails[2:], ["amy@example.com"])
+        self.assertEqual(self.search("ZED"), ["zed@example.com"])
+
+    @override_settings(USER_SEARCH_MIN_LENGTH=3)
+    def test_short_terms_return_nothing(self) -> None:
+        create_user("bob@example.com")
+
+        self.assertEqual(self.search("bo"), [])
+        self.assertEqual(self.search("bob"), ["bob@example.com"])
+
+    @override_settings(USER_SEARCH_LIMIT=3)
+    def test_results_are_limited(self) -> None:
+        for number in range(5):
+            create_user(f"match{number}@example.com")
+
+        self.assertEqual(len(self.search("match")), 3)
+
+
+class PostFilterTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user("user@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_out_of_range_ids_are_rejected(self) -> None:
+        for tags in ("0", "-1", "1,99999999999999999999", "a"):
+            response = self.client.get(
+                reverse("user:post-list"), {"tags": tags}
+            )
+            self.assertEqual(response.status_code, 400, tags)
+            self.assertEqual(list(response.data), ["tags"])
+
+        response = self.client.post(
+            reverse("user:post-bulk-like"),
+            {"like": [99999999999999999999]},
+            format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class MetricsTests(TestCase):
+    def setUp(self) -> None:
+        self.url = reverse("metrics")
+
+    def test_public_addresses_are_refused(self) -> None:
+        response = self.client.get(self.url, REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, 403)
+
+    def test_allowed_networks_and_staff_can_scrape(self) -> None:
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.client.force_login(
+            create_user("staff@example.com", is_staff=True)
+        )
+        response = self.client.get(self.url, REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, 200)
+
+
+class PostCountersTests(TestCase):
+    def setUp(self) -> None:
+        self.author = create_user("author@example.com")
+        self.reader = create_user("reader@example.com")
+        self.post = create_post(self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def like_and_comment(self) -> None:
+        self.client.post(reverse("user:post-like", args=[self.post.pk]))
+        self.client.post(
+            reverse("user:post-comment", args=[self.post.pk]),
+            {"content": "Nice"}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_deleting_user_recounts_their_likes_and_comments(self) -> None:
+        self.like_and_comment()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.delete()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_deleting_comments_recounts_their_post_once(self) -> None:
+        self.like_and_comment()
+        Comment.objects.create(
+            post=self.post, commentator=self.author, content="Thanks"
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.filter(post=self.post).delete()
+
+        recounts = [
+            query for query in context.captured_queries
+            if '"comments_count"' in query["sql"]
+        ]
+        self.assertEqual(len(recounts), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_comments_created_without_the_api_are_counted(self) -> None:
+        Comment.objects.create(
+            post=self.post, commentator=self.reader, content="Nice"
+        )
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_likes_changed_without_the_api_are_recounted(self) -> None:
+        other = create_post(self.author)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.likes.add(self.reader, self.author)
+            self.reader.liked_posts.add(other)
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.likes_count, other.likes_count), (2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.likes.remove(self.author)
+            self.reader.liked_posts.clear()
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.likes_count, other.likes_count), (0, 0))
+
+    def test_rebuild_counters_repairs_drift(self) -> None:
+        self.like_and_comment()
+        Post.objects.update(likes_count=7, comments_count=7)
+
+        call_command("rebuild_counters", stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = create_user("author@example.com")
+        self.post = create_post(self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(create_user("reader@example.com"))
+        self.post_url = reverse("user:post-detail", args=[self.post.pk])
+        self.user_url = reverse("user:user-other", args=[self.author.pk])
+
+    def etag(self, url: str) -> str:
+        return self.client.get(url).headers["ETag"]
+
+    def assertChangesETag(self, url: str, change) -> None:
+        etag = self.etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_matching_etag_returns_not_modified(self) -> None:
+        for url in (self.post_url, self.user_url):
+            with self.subTest(url=url):
+                etag = self.etag(url)
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.headers["ETag"], etag)
+                self.assertIn("no-cache", response.headers["Cache-Control"])
+
+    def test_like_and_comment_change_post_etag(self) -> None:
+        self.assertChangesETag(
+            self.post_url,
+            lambda: self.client.post(
+                reverse("user:post-like", args=[self.post.pk])
+            )
+        )
+        self.assertChangesETag(
+            self.post_url,
+            lambda: self.client.post(
+                reverse("user:post-comment", args=[self.post.pk]),
+                {"content": "Nice"}
+            )
+        )
+
+    def test_profile_edit_changes_user_etag(self) -> None:
+        def edit() -> None:
+            client = APIClient()
+            client.force_authenticate(self.author)
+            response = client.patch(reverse("user:user-me"), {"bio": "Bio"})
+            self.assertEqual(response.status_code, 200)
+
+        self.assertChangesETag(self.user_url, edit)
+
+
+class TrendingTests(TestCase):
+    def setUp(self) -> None:
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch.object(
+            trending, "get_client", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.author = create_user("author@example.com")
+        self.readers = [
+            create_user(f"reader{number}@example.com") for number in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.readers[0])
+
+    def engage(
+        self,
+        post: Post,
+        likes: int = 0,
+        comments: int = 0,
+        age: timedelta = timedelta()
+    ) -> None:
+        for reader in self.readers[:likes]:
+            interactions.like(reader, post)
+        for reader in self.readers[:comments]:
+            Comment.objects.create(
+                post=post, commentator=reader, content="Comment"
+            )
+        created_at = timezone.now() - age
+        Like.objects.filter(post=post).update(created_at=created_at)
+        Comment.objects.filter(post=post).update(created_at=created_at)
+
+    def ranking(self, url: str, window: str) -> list[int]:
+        for source, model in trending.SOURCES.items():
+            trending.ingest(self.redis, source, model)
+        trending.rebuild_rankings(self.redis)
+        response = self.client.get(url, {"window": window})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data]
+
+    def test_posts_rank_by_weighted_engagement(self) -> None:
+        liked, commented, quiet = (
+            create_post(self.author) for _ in range(3)
+        )
+        self.engage(liked, likes=2)
+        self.engage(commented, comments=1)
+
+        self.assertEqual(
+            self.ranking(reverse("user:post-trending"), "day"),
+            [commented.pk, liked.pk]
+        )
+
+    def test_windows_drop_older_engagement(self) -> None:
+        recent, older, ancient = (
+            create_post(self.author) for _ in range(3)
+        )
+        self.engage(recent, likes=1)
+        self.engage(older, likes=3, age=timedelta(days=2))
+        self.engage(ancient, likes=3, age=timedelta(days=8))
+        url = reverse("user:post-trending")
+
+        self.assertEqual(self.ranking(url, "day"), [recent.pk])
+        self.assertEqual(self.ranking(url, "week"), [recent.pk, older.pk])
+
+    def test_tags_rank_by_engagement_of_their_posts(self) -> None:
+        popular, niche = Tag.objects.bulk_create(
+            [Tag(name="popular"), Tag(name="niche")]
+        )
+        first, second = create_post(self.author), create_post(self.author)
+        first.tags.add(popular, niche)
+        second.tags.add(popular)
+        self.engage(first, likes=1)
+        self.engage(second, likes=1)
+
+        self.assertEqual(
+            self.ranking(reverse("user:tag-trending"), "day"),
+            [popular.pk, niche.pk]
+        )
+
+
+@override_settings(API_CACHE_LOCK_POLL_INTERVAL=0.01)
+class ReadThroughCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = create_user("author@example.com", first_name="Ann")
+        self.post = create_post(self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(create_user("reader@example.com"))
+
+    def rename(self, first_name: str, **extra_fields) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = first_name
+            self.author.save(**extra_fields)
+
+    def test_profile_edits_reach_cached_users_and_posts(self) -> None:
+        user_url = reverse("user:user-other", args=[self.author.pk])
+        post_url = reverse("user:post-detail", args=[self.post.pk])
+        self.client.get(user_url)
+        self.client.get(post_url)
+
+        self.rename("Bea")
+
+        self.assertEqual(self.client.get(user_url).data["first_name"], "Bea")
+        self.assertEqual(
+            self.client.get(post_url).data["author"]["first_name"], "Bea"
+        )
+
+    def test_unrendered_changes_keep_cached_posts(self) -> None:
+        version = api_cache.get_version("post", self.post.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.bio = "Bio"
+            self.author.set_password("another password")
+            self.author.save()
+        self.rename("Bea", update_fields=["bio"])
+
+        self.assertEqual(api_cache.get_version("post", self.post.pk), version)
+
+    def test_concurrent_misses_compute_once(self) -> None:
+        calls = []
+
+        def compute() -> dict:
+            calls.append(1)
+            time.sleep(0.1)
+            return {"value": 1}
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    api_cache.read_through("user", 1, compute)
+                )
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"value": 1}] * 4)
+
+    def test_concurrent_async_misses_compute_once(self) -> None:
+        calls = []
+
+        async def compute() -> dict:
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {"value": 1}
+
+        async def read() -> list:
+            return await asyncio.gather(
+                *(
+                    api_cache.aread_through("post", 1, compute)
+                    for _ in range(4)
+                )
+            )
+
+        self.assertEqual(asyncio.run(read()), [{"value": 1}] * 4)
+        self.assertEqual(len(calls), 1)
+
+
+class InteractionTests(TestCase):
+    def setUp(self) -> None:
+        self.author = create_user("author@example.com")
+        self.reader = create_user("reader@example.com")
+        self.post = create_post(self.author)
+
+    def assertCounters(self, likes: int, subscribers: int) -> None:
+        self.post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.reader.refresh_from_db()
+        self.assertEqual(self.post.likes_count, likes)
+        self.assertEqual(self.author.subscribers_count, subscribers)
+        self.assertEqual(self.reader.subscriptions_count, subscribers)
+
+    def test_repeated_likes_count_once(self) -> None:
+        self.assertTrue(interactions.like(self.reader, self.post))
+        self.assertFalse(interactions.like(self.reader, self.post))
+        self.assertCounters(likes=1, subscribers=0)
+
+        self.assertTrue(interactions.unlike(self.reader, self.post))
+        self.assertFalse(interactions.unlike(self.reader, self.post))
+        self.assertCounters(likes=0, subscribers=0)
+
+    def test_repeated_subscriptions_count_once(self) -> None:
+        self.assertTrue(interactions.subscribe(self.reader, self.author))
+        self.assertFalse(interactions.subscribe(self.reader, self.author))
+        self.assertCounters(likes=0, subscribers=1)
+
+        self.assertTrue(interactions.unsubscribe(self.reader, self.author))
+        self.assertFalse(interactions.unsubscribe(self.reader, self.author))
+        self.assertCounters(likes=0, subscribers=0)
+
+    def test_bulk_writes_shift_counters(self) -> None:
+        other = create_post(self.author)
+        with CaptureQueriesContext(connection) as context:
+            interactions.bulk_like(self.reader, [self.post.pk, other.pk], [])
+            interactions.bulk_subscribe(self.reader, [self.author.pk], [])
+        self.assertCounters(likes=1, subscribers=1)
+        for query in context.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"].upper())
+
+        results = interactions.bulk_like(self.reader, [], [self.post.pk])
+        self.assertEqual(results["unlike"][0]["status"], 201)
+        self.assertCounters(likes=0, subscribers=1)
+        other.refresh_from_db()
+        self.assertEqual(other.likes_count, 1)
+
+
+@override_settings(FEED_FAN_OUT_LIMIT=1)
+class SubscriptionCountersTests(TestCase):
+    def test_deleting_user_recounts_both_sides(self) -> None:
+        deleted = create_user("deleted@example.com")
+        subscriber = create_user("subscriber@example.com")
+        author = create_user("author@example.com")
+        reader = create_user("reader@example.com")
+        interactions.subscribe(subscriber, deleted)
+        interactions.subscribe(deleted, author)
+        interactions.subscribe(reader, author)
+        post = create_post(author)
+
+        with mock.patch.object(
+            tasks.backfill_author_feeds,
+            "delay",
+            tasks.backfill_author_feeds
+        ), self.captureOnCommitCallbacks(execute=True):
+            deleted.delete()
+
+        subscriber.refresh_from_db()
+        author.refresh_from_db()
+        self.assertEqual(subscriber.subscriptions_count, 0)
+        self.assertEqual(author.subscribers_count, 1)
+        # Back under the fan-out limit, the author is pushed again
+        self.assertTrue(reader.feed_items.filter(post=post).exists())
+
+
+@override_settings(FEED_FAN_OUT_LIMIT=1)
+class FeedTests(TestCase):
+    def setUp(self) -> None:
+        self.reader = create_user("reader@example.com")
+        self.other = create_user("other@example.com")
+        self.pushed_author = create_user("pushed@example.com")
+        self.pulled_author = create_user("pulled@example.com")
+        interactions.subscribe(self.reader, self.pushed_author)
+        interactions.subscribe(self.reader, self.pulled_author)
+        interactions.subscribe(self.other, self.pulled_author)
+
+        start = timezone.now() - timedelta(days=1)
+        self.posts = []
+        for minutes in range(7):
+            author = (self.pushed_author, self.pulled_author)[minutes % 2]
+            post = create_post(
+                author, created_at=start + timedelta(minutes=minutes)
+            )
+            feed.fan_out_post(post.pk)
+            self.posts.append(post)
+        create_post(self.other)
+        self.expected = [post.pk for post in reversed(self.posts)]
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.url = reverse("user:post-list") + "?subscriptions=1"
+
+    def test_feed_merges_pushed_and_pulled_posts(self) -> None:
+        self.assertEqual(walk(self.client, self.url), self.expected)
+
+    def test_cursor_pages_walk_the_feed_both_ways(self) -> None:
+        url = self.url + "&pagination=cursor&page_size=2"
+        self.assertEqual(walk(self.client, url), self.expected)
+
+        pages = [
+            self.expected[start:start + 2]
+            for start in range(0, len(self.expected), 2)
+        ]
+        response = self.client.get(url)
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+        self.assertEqual(
+            walk(self.client, response.data["previous"], "previous"),
+            [pk for page in reversed(pages[:-1]) for pk in page],
+        )
+
+    def test_feed_page_reads_the_feed_index(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = feed.feed_queryset(
+            self.reader, Post.objects.all(), limit=11
+        ).explain()
+        self.assertIn("feed_item_owner_created_idx", plan)
+
+    def test_author_back_under_the_limit_is_backfilled(self) -> None:
+        self.client.force_authenticate(self.other)
+        with mock.patch.object(
+            tasks.backfill_author_feeds,
+            "delay",
+            tasks.backfill_author_feeds
+        ), self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("user:user-unsubscribe", args=[self.pulled_author.pk])
+            )
+
+        self.assertEqual(
+            set(
+                self.reader.feed_items.values_list("post_id", flat=True)
+            ),
+            set(self.expected),
+        )
+
+
+@override_settings(AUTH_TOKEN_TTL=3600, AUTH_TOKEN_RENEW_INTERVAL=60)
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "user.redis_cache.AsyncRedisCache",
+            "LOCATION": "redis://localhost:6379/1",
+            "OPTIONS": {"connection_class": fakeredis.FakeConnection},
+        }
+    }
+)
+class AuthTokenTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_user("user@example.com")
+        self.key, self.token = tokens.issue(self.user)
+        self.cache_key = authentication.token_cache_key(self.token.digest)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.key}")
+
+    def get(self, later: timedelta = timedelta()):
+        now = timezone.now() + later
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            return self.client.get(reverse("user:post-list"))
+
+    def test_expired_token_is_rejected(self) -> None:
+        self.assertEqual(self.get().status_code, 200)
+
+        response = self.get(timedelta(hours=1, seconds=1))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"], "Token has expired.")
+
+    def test_used_token_is_renewed(self) -> None:
+        self.assertEqual(self.get(timedelta(minutes=59)).status_code, 200)
+
+        expires_at = AuthToken.objects.get(pk=self.token.pk).expires_at
+        self.assertGreater(expires_at, self.token.expires_at)
+        response = self.get(timedelta(hours=1, minutes=1))
+        self.assertEqual(response.status_code, 200)
+
+    def assertCached(self, cached: bool = True) -> None:
+        for credentials_cache in (authentication.local_cache, cache):
+            self.assertEqual(
+                credentials_cache.get(self.cache_key) is not None, cached
+            )
+
+    def test_logout_forgets_cached_token(self) -> None:
+        self.assertEqual(self.get().status_code, 200)
+        self.assertCached()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("user:logout"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCached(False)
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_password_change_forgets_cached_tokens(self) -> None:
+        self.assertEqual(self.get().status_code, 200)
+        self.assertCached()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("user:user-me"), {"password": "new-password"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCached(False)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("new-password"))
+
+    def test_cached_token_of_deactivated_user_is_rejected(self) -> None:
+        self.assertEqual(self.get().status_code, 200)
+        self.assertCached()
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        self.assertCached(False)
+        response = self.get()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"], "User inactive or deleted.")
+
+    def test_purge_deletes_only_expired_tokens(self) -> None:
+        _, expired = tokens.issue(self.user)
+        AuthToken.objects.filter(pk=expired.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(tokens.purge_expired(batch_size=1), 1)
+        self.assertEqual(
+            list(AuthToken.objects.values_list("pk", flat=True)),
+            [self.token.pk]
+        )
+
+
+@mock.patch.object(tasks.push_post_to_feeds, "delay")
+class ScheduledPostTests(TestCase):
+    def setUp(self) -> None:
+        self.author = create_user("author@example.com")
+        self.tag = Tag.objects.create(name="tag")
+
+    def schedule(self, delay: timedelta) -> ScheduledPost:
+        scheduled = ScheduledPost.objects.create(
+            title="Scheduled",
+            content="Content",
+            author=self.author,
+            publish_at=timezone.now() + delay
+        )
+        scheduled.tags.add(self.tag)
+        return scheduled
+
+    def test_due_posts_are_published_once(self, push) -> None:
+        due = self.schedule(-timedelta(minutes=1))
+        self.schedule(timedelta(hours=1))
+
+        self.assertEqual(tasks.publish_scheduled_posts(), 1)
+        self.assertEqual(tasks.publish_scheduled_posts(), 0)
+
+        post = Post.objects.get()
+        self.assertEqual(post.created_at, due.publish_at)
+        self.assertEqual(list(post.tags.all()), [self.tag])
+        self.assertEqual(ScheduledPost.objects.count(), 1)
+        push.assert_called_once_with(post.pk)
+
+    def test_retried_delayed_post_publishes_once(self, push) -> None:
+        scheduled = self.schedule(timedelta())
+
+        tasks.delayed_post(scheduled.pk)
+        tasks.delayed_post(scheduled.pk)
+        tasks.publish_scheduled_posts()
+
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(ScheduledPost.objects.exists())
+        push.assert_called_once()
+
+
+class UploadTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(create_user("author@example.com"))
+
+    def upload(self, image: bytes, content: str = "Content"):
+        return self.client.post(
+            reverse("user:post-list"),
+            {
+                "title": "Title",
+                "content": content,
+                "image": ContentFile(image, "photo.png"),
+            },
+            format="multipart"
+        )
+
+    def test_image_within_limits_is_accepted(self) -> None:
+        response = self.upload(image_file(image_format="PNG").getvalue())
+        self.assertEqual(response.status_code, 201)
+
+    @override_settings(UPLOAD_MAX_SIZE=1000, DATA_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_request_above_content_length_limit_is_refused(self) -> None:
+        with mock.patch.object(
+            LimitedUploadHandler, "receive_data_chunk"
+        ) as receive:
+            response = self.upload(
+                b"\x89PNG\r\n\x1a\n" + bytes(100), content="x" * 2000
+            )
+        self.assertEqual(response.status_code, 413)
+        receive.assert_not_called()
+
+    @override_settings(UPLOAD_MAX_SIZE=1000)
+    def test_file_part_above_upload_limit_is_refused(self) -> None:
+        response = self.upload(b"\x89PNG\r\n\x1a\n" + bytes(5000))
+        self.assertEqual(response.status_code, 413)
+
+    def test_file_without_image_signature_is_refused(self) -> None:
+        response = self.upload(b"#!/bin/sh\necho not an image\n")
+        self.assertEqual(response.status_code, 415)
+
+    @override_settings(IMAGE_MAX_PIXELS=100 * 100)
+    def test_image_above_pixel_limit_is_refused(self) -> None:
+        response = self.upload(image_file(image_format="PNG").getvalue())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [str(error) for error in response.data["image"]],
+            ["Images must not exceed 10000 pixels."]
+        )
+
+    def test_unreadable_header_is_invalid(self) -> None:
+        response = self.upload(b"\x89PNG\r\n\x1a\n" + bytes(100))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("image", response.data)
+
+
+@override_settings(IMAGE_RENDITIONS={"thumbnail": 32, "feed": 64})
+class RenditionTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.author = create_user("author@example.com")
+
+    def test_renditions_are_resized_oriented_and_stripped(self) -> None:
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        post = create_post(
+            self.author,
+            image=ContentFile(
+                image_file(exif=exif.tobytes()).getvalue(), "photo.jpg"
+            )
+        )
+
+        self.assertTrue(process_renditions(Post, post.pk, "image"))
+
+        post.refresh_from_db()
+        self.assertEqual(post.image_renditions["source"], post.image.name)
+        files = post.image_renditions["files"]
+        self.assertEqual(set(files), {"thumbnail", "feed"})
+        for name, side in (("thumbnail", 32), ("feed", 64)):
+            self.assertEqual(set(files[name]), {"webp", "jpeg"})
+            for image_format, path in files[name].items():
+                with post.image.storage.open(path) as file:
+                    image = Image.open(file)
+                    self.assertEqual(image.format.lower(), image_format)
+                    # Rotated by the EXIF orientation, which is dropped
+                    self.assertEqual(image.size, (side // 2, side))
+                    self.assertNotIn(0x0112, image.getexif())
+
+    def test_serializer_returns_absolute_rendition_urls(self) -> None:
+        post = create_post(
+            self.author,
+            image=ContentFile(image_file().getvalue(), "photo.jpg")
+        )
+        process_renditions(Post, post.pk, "image")
+        client = APIClient()
+        client.force_authenticate(self.author)
+
+        response = client.get(reverse("user:post-detail", args=[post.pk]))
+
+        renditions = response.data["image_renditions"]
+        self.assertEqual(set(renditions), {"thumbnail", "feed"})
+        self.assertTrue(
+            renditions["feed"]["webp"].startswith("http://testserver/media/")
+        )
+        self.assertTrue(renditions["feed"]["webp"].endswith(".webp"))
+
+    def refcounts(self, names: list[str]) -> list[int]:
+        refcounts = dict(
+            Blob.objects.filter(name__in=names).values_list("name", "refcount")
+        )
+        return [refcounts.get(name, 0) for name in names]
+
+    def test_source_is_referenced_before_renditions_are_made(self) -> None:
+        post = create_post(
+            self.author,
+            image=ContentFile(image_file().getvalue(), "photo.jpg")
+        )
+
+        self.assertEqual(post.image_renditions, {})
+        self.assertEqual(self.refcounts([post.image.name]), [1])
+
+        process_renditions(Post, post.pk, "image")
+        post.refresh_from_db()
+        renditions = blobs.referenced(post.image_renditions)
+        self.assertEqual(len(renditions), 4)
+        self.assertEqual(
+            self.refcounts([post.image.name] + renditions), [1] * 5
+        )
+
+    def test_stale_save_keeps_renditions_and_references(self) -> None:
+        post = create_post(
+            self.author,
+            image=ContentFile(image_file().getvalue(), "photo.jpg")
+        )
+        stale = Post.objects.get(pk=post.pk)
+        process_renditions(Post, post.pk, "image")
+        post.refresh_from_db()
+        source = post.image.name
+        renditions = blobs.referenced(post.image_renditions)
+
+        stale.title = "Edited"
+        stale.save()
+
+        post.refresh_from_db()
+        self.assertEqual(post.title, "Edited")
+        self.assertEqual(blobs.referenced(post.image_renditions), renditions)
+
+        post.image = ContentFile(
+            image_file(size=(100, 200)).getvalue(), "other.jpg"
+        )
+        post.save()
+        self.assertEqual(self.refcounts([source, post.image.name]), [0, 1])
+        process_renditions(Post, post.pk, "image")
+        self.assertEqual(self.refcounts(renditions), [0] * 4)
+
+        post.refresh_from_db()
+        held = [post.image.name] + blobs.referenced(post.image_renditions)
+        post.delete()
+        self.assertEqual(self.refcounts(held), [0] * 5)
+
+
+class BlobTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def save(self, content: bytes, age: timedelta = timedelta()) -> str:
+        name = self.storage.save("image.jpg", ContentFile(content))
+        modified = (timezone.now() - age).timestamp()
+        os.utime(self.storage.path(name), (modified, modified))
+        return name
+
+    def collect(self) -> int:
+        return blobs.collect(timedelta(hours=1), storage=self.storage)
+
+    def test_blob_survives_until_last_reference_is_released(self) -> None:
+        name = self.save(b"shared", age=timedelta(days=1))
+        blobs.retain([name, name])
+
+        blobs.release([name])
+        self.assertEqual(Blob.objects.get(name=name).refcount, 1)
+        self.assertEqual(self.collect(), 0)
+
+        blobs.release([name])
+        Blob.objects.filter(name=name).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(self.collect(), 1)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+
+    def test_recently_released_blob_is_kept(self) -> None:
+        name = self.save(b"recent", age=timedelta(days=1))
+        blobs.retain([name])
+        blobs.release([name])
+
+        self.assertEqual(self.collect(), 0)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_untracked_files_are_swept_after_grace_period(self) -> None:
+        orphan = self.save(b"orphan", age=timedelta(days=1))
+        fresh = self.save(b"fresh")
+        tracked = self.save(b"tracked", age=timedelta(days=1))
+        blobs.retain([tracked])
+
+        self.assertEqual(self.collect(), 1)
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(fresh))
+        self.assertTrue(self.storage.exists(tracked))
@@ -0,0 +1,73 @@
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from user.models import User, AuthToken
+
+PURGE_SQL = """
+    DELETE FROM {tokens} WHERE id IN (
+        SELECT id FROM {tokens}
+        WHERE expires_at < %s
+        ORDER BY expires_at
+        LIMIT %s
+    )
+"""
+
+
+def digest(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def lifetime() -> timedelta:
+    return timedelta(seconds=settings.AUTH_TOKEN_TTL)
+
+
+def issue(user: User) -> tuple[str, AuthToken]:
+    """Create a token and return its key, which is never stored"""
+    key = secrets.token_hex(20)
+    token = AuthToken.objects.create(
+        digest=digest(key),
+        user=user,
+        expires_at=timezone.now() + lifetime()
+    )
+    return key, token
+
+
+def renew(token: AuthToken) -> bool:
+    """
+    Slide the expiry of a used token forward. It is written at most
+    once per renewal interval, not on every request
+    """
+    now = timezone.now()
+    renew_after = timedelta(seconds=settings.AUTH_TOKEN_RENEW_INTERVAL)
+    if token.expires_at > now + lifetime() - renew_after:
+        return False
+    token.expires_at = now + lifetime()
+    AuthToken.objects.filter(pk=token.pk).update(
+        expires_at=token.expires_at
+    )
+    return True
+
+
+def purge_expired(batch_size: int = None) -> int:
+    """
+    Delete expired tokens oldest first, in batches committed one by
+    one, so no statement holds many row locks for long
+    """
+    batch_size = batch_size or settings.AUTH_TOKEN_PURGE_BATCH_SIZE
+    sql = PURGE_SQL.format(
+        tokens=connection.ops.quote_name(AuthToken._meta.db_table)
+    )
+    now = timezone.now()
+    purged = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [now, batch_size])
+            deleted = cursor.rowcount
+        purged += deleted
+        if deleted < batch_size:
+            return purged
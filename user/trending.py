@@ -0,0 +1,164 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.db.models import Model, QuerySet
+from django.utils import timezone
+
+from user.models import Post, Like, Comment
+
+BUCKET_SECONDS = 60 * 60
+BUCKET_KEY = "trending:{kind}:bucket:{bucket}"
+RANKING_KEY = "trending:{kind}:{window}"
+CURSOR_KEY = "trending:cursor:{source}"
+LOCK_KEY = "trending:lock"
+KINDS = ("posts", "tags")
+SOURCES = {"like": Like, "comment": Comment}
+
+_client = None
+
+
+def get_client() -> redis.Redis | None:
+    """Rankings live in redis only, without REDIS_URL there is nothing"""
+    global _client
+    if _client is None and settings.REDIS_URL:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def bucket_of(timestamp: float) -> int:
+    return int(timestamp // BUCKET_SECONDS)
+
+
+def horizon() -> int:
+    return max(settings.TRENDING_WINDOWS.values())
+
+
+def post_tags(post_ids: set[int]) -> dict[int, list[int]]:
+    tags = defaultdict(list)
+    for post_id, tag_id in Post.tags.through.objects.filter(
+        post_id__in=post_ids
+    ).values_list("post_id", "tag_id"):
+        tags[post_id].append(tag_id)
+    return tags
+
+
+def ingest(client: redis.Redis, source: str, model: type[Model]) -> int:
+    """
+    Add likes or comments created after the stored cursor to hourly
+    buckets of post and tag scores. Rows are walked by primary key,
+    so each of them is read once and history is never rescanned
+    """
+    cursor_key = CURSOR_KEY.format(source=source)
+    last_id = int(client.get(cursor_key) or 0)
+    weight = settings.TRENDING_WEIGHTS[source]
+    oldest = timezone.now() - timedelta(hours=horizon())
+    ttl = (horizon() + 1) * BUCKET_SECONDS
+    ingested = 0
+
+    while True:
+        rows = list(
+            model.objects
+            .filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "post_id", "created_at")
+            [:settings.TRENDING_BATCH_SIZE]
+        )
+        if not rows:
+            return ingested
+        last_id = rows[-1][0]
+        rows = [
+            row for row in rows
+            if row[2] is not None and row[2] >= oldest
+        ]
+        tags = post_tags({post_id for _, post_id, _ in rows})
+
+        scores = defaultdict(float)
+        for _, post_id, created_at in rows:
+            bucket = bucket_of(created_at.timestamp())
+            posts_key = BUCKET_KEY.format(kind="posts", bucket=bucket)
+            tags_key = BUCKET_KEY.format(kind="tags", bucket=bucket)
+            scores[posts_key, post_id] += weight
+            for tag_id in tags[post_id]:
+                scores[tags_key, tag_id] += weight
+
+        with client.pipeline() as pipe:
+            for (key, member), score in scores.items():
+                pipe.zincrby(key, score, member)
+            for key in {key for key, _ in scores}:
+                pipe.expire(key, ttl)
+            pipe.set(cursor_key, last_id)
+            pipe.execute()
+        ingested += len(rows)
+
+
+def rebuild_rankings(client: redis.Redis) -> None:
+    """
+    Sum the buckets of every window, halving a bucket's weight each
+    half-life, and keep only the top entries
+    """
+    now = bucket_of(time.time())
+    with client.pipeline() as pipe:
+        for kind in KINDS:
+            for window, hours in settings.TRENDING_WINDOWS.items():
+                key = RANKING_KEY.format(kind=kind, window=window)
+                buckets = {
+                    BUCKET_KEY.format(kind=kind, bucket=now - age): (
+                        0.5 ** (age / settings.TRENDING_HALF_LIFE)
+                    )
+                    for age in range(hours)
+                }
+                pipe.zunionstore(key, buckets)
+                pipe.zremrangebyrank(key, 0, -settings.TRENDING_SIZE - 1)
+        pipe.execute()
+
+
+def refresh() -> bool:
+    """Ingest new engagement and recompute rankings, once at a time"""
+    client = get_client()
+    if client is None:
+        return False
+    lock = client.lock(LOCK_KEY, timeout=settings.CELERY_TASK_TIME_LIMIT)
+    if not lock.acquire(blocking=False):
+        return False
+    try:
+        for source, model in SOURCES.items():
+            ingest(client, source, model)
+        rebuild_rankings(client)
+    finally:
+        lock.release()
+    return True
+
+
+def top(kind: str, window: str, limit: int) -> list[tuple[int, float]]:
+    client = get_client()
+    if client is None:
+        return []
+    return [
+        (int(member), score)
+        for member, score in client.zrevrange(
+            RANKING_KEY.format(kind=kind, window=window),
+            0,
+            limit - 1,
+            withscores=True
+        )
+    ]
+
+
+def ranked(
+    kind: str,
+    queryset: QuerySet,
+    window: str,
+    limit: int
+) -> list[Model]:
+    """Load ranked objects in ranking order, each with its score"""
+    ranking = top(kind, window, limit)
+    objects = queryset.in_bulk([pk for pk, _ in ranking])
+    result = []
+    for pk, score in ranking:
+        if pk in objects:
+            objects[pk].score = score
+            result.append(objects[pk])
+    return result
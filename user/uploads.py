@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+IMAGE_FORMATS = ("JPEG", "PNG", "GIF", "WEBP")
+IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",
+    b"\x89PNG\r\n\x1a\n",
+    b"GIF87a",
+    b"GIF89a",
+)
+
+
+class UploadTooLarge(APIException, SuspiciousOperation):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Uploaded file is too large."
+    default_code = "upload_too_large"
+
+
+class UnsupportedImage(APIException, SuspiciousOperation):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_detail = "Upload a JPEG, PNG, GIF or WebP image."
+    default_code = "unsupported_image"
+
+
+def request_size_limit() -> int:
+    return settings.UPLOAD_MAX_SIZE + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+
+
+def looks_like_image(head: bytes) -> bool:
+    return head.startswith(IMAGE_SIGNATURES) or (
+        head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+    )
+
+
+def read_image_header(file) -> Image.Image:
+    """Parse the format and size of an image, leaving its pixels alone"""
+    file.seek(0)
+    image = Image.open(file, formats=IMAGE_FORMATS)
+    file.seek(0)
+    return image
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+    Goes in front of the default handlers and aborts a multipart upload
+    from its Content-Length, a file part header or the first chunk,
+    before the rest of the body is read into memory or a temporary file
+    """
+
+    def handle_raw_input(
+        self,
+        input_data,
+        META,
+        content_length,
+        boundary,
+        encoding=None
+    ) -> None:
+        if content_length > request_size_limit():
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs) -> None:
+        super().new_file(*args, **kwargs)
+        if self.content_length and (
+            self.content_length > settings.UPLOAD_MAX_SIZE
+        ):
+            raise UploadTooLarge()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> bytes:
+        if start == 0 and not looks_like_image(raw_data):
+            raise UnsupportedImage()
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_SIZE:
+            raise UploadTooLarge()
+        return raw_data
+
+    def file_complete(self, file_size: int) -> None:
+        return None
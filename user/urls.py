@@ -8,9 +8,13 @@ from user.views import (
     UserListView,
     UserYourProfileView,
     UserOtherProfileView,
+    UserSubscribersView,
+    UserSubscriptionsView,
     UserSubscribeView,
+    UserBulkSubscribeView,
     UserUnsubscribeView,
     PostViewSet,
+    TagTrendingView,
 )
 
 app_name = "user"
@@ -29,11 +33,26 @@ urlpatterns = [
         UserYourProfileView.as_view(),
         name="user-me"
     ),
+    path(
+        "users/bulk-subscribe/",
+        UserBulkSubscribeView.as_view(),
+        name="user-bulk-subscribe"
+    ),
     path(
         "users/<int:pk>/",
         UserOtherProfileView.as_view(),
         name="user-other"
     ),
+    path(
+        "users/<int:pk>/subscribers/",
+        UserSubscribersView.as_view(),
+        name="user-subscribers"
+    ),
+    path(
+        "users/<int:pk>/subscriptions/",
+        UserSubscriptionsView.as_view(),
+        name="user-subscriptions"
+    ),
     path(
         "users/<int:pk>/subscribe/",
         UserSubscribeView.as_view(),
@@ -43,5 +62,10 @@ urlpatterns = [
         UserUnsubscribeView.as_view(),
         name="user-unsubscribe"
     ),
+    path(
+        "tags/trending/",
+        TagTrendingView.as_view(),
+        name="tag-trending"
+    ),
     path("", include(router.urls)),
 ]
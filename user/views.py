@@ -1,8 +1,20 @@
-import json
-
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import QuerySet
-from django_celery_beat.models import ClockedSchedule, PeriodicTask
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import transaction
+from django.db.models import (
+    BigIntegerField,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    QuerySet,
+    Prefetch,
+)
+from django.db.models.functions import Cast
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
 from drf_spectacular.utils import (
     OpenApiResponse,
     extend_schema,
@@ -13,6 +25,7 @@ from drf_spectacular.utils import (
 from rest_framework import generics, status, viewsets
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import (
     AllowAny,
@@ -24,8 +37,23 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from user.models import User, Post
-from user.pagination import ListPagination
+from user import (
+    cache,
+    feed,
+    interactions,
+    search,
+    tagging,
+    tokens,
+    trending,
+)
+from user.asynchronous import AsyncViewMixin
+from user.conditional import make_etag, not_modified, with_validators
+from user.models import User, Tag, Post, Like, Comment
+from user.pagination import (
+    ListPagination,
+    KeysetPagination,
+    PaginationModeMixin,
+)
 from user.permissions import IsAuthor
 from user.serializers import (
     UserCreateSerializer,
@@ -35,9 +63,49 @@ from user.serializers import (
     PostCreateUpdateSerializer,
     PostListSerializer,
     PostDetailSerializer,
+    CommentSerializer,
     CommentCreateSerializer,
     PostCreateScheduleSerializer,
+    BulkLikeSerializer,
+    BulkSubscribeSerializer,
+    TrendingPostSerializer,
+    TrendingTagSerializer,
 )
+from user.tasks import delayed_post
+
+TRENDING_PARAMETERS = [
+    OpenApiParameter(
+        name="window",
+        type=str,
+        location=OpenApiParameter.QUERY,
+        description="Ranking window, `day` by default",
+        required=False,
+        enum=list(settings.TRENDING_WINDOWS),
+    ),
+    OpenApiParameter(
+        name="limit",
+        type=int,
+        location=OpenApiParameter.QUERY,
+        description="Number of results, "
+                    f"at most {settings.TRENDING_SIZE}",
+        required=False,
+    ),
+]
+
+
+def trending_params(request: Request) -> tuple[str, int]:
+    """Read the ranking window and size requested for trending results"""
+    window = request.query_params.get("window", "day")
+    if window not in settings.TRENDING_WINDOWS:
+        choices = ", ".join(settings.TRENDING_WINDOWS)
+        raise ValidationError({"window": [f"Choose one of {choices}"]})
+    try:
+        limit = int(
+            request.query_params.get("limit", ListPagination.page_size)
+        )
+    except ValueError:
+        raise ValidationError({"limit": ["A valid integer is required."]})
+    return window, max(1, min(limit, settings.TRENDING_SIZE))
 
 
 class UserCreateView(generics.CreateAPIView):
@@ -46,12 +114,34 @@ class UserCreateView(generics.CreateAPIView):
     permission_classes = (AllowAny,)
 
 
+@extend_schema_view(
+    post=extend_schema(
+        responses=OpenApiResponse(
+            response={"token": "string", "expires_at": "date-time"},
+            description="Issues a new token, which expires unless it is "
+                        "used within its lifetime",
+            examples=[OpenApiExample(
+                name="login",
+                value={
+                    "token": "9944b09199c62bcf9418ad846dd0e4bbdfc6ee4b",
+                    "expires_at": "2026-11-01T12:00:00Z"
+                }
+            )]
+        )
+    )
+)
 class UserLoginView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     authentication_classes = ()
     permission_classes = (AllowAny,)
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer,)
 
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key, token = tokens.issue(serializer.validated_data["user"])
+        return Response({"token": key, "expires_at": token.expires_at})
+
 
 @extend_schema_view(
     post=extend_schema(
@@ -80,10 +170,15 @@ class UserLogoutView(APIView):
         )
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(
+    AsyncViewMixin,
+    PaginationModeMixin,
+    generics.ListAPIView
+):
     serializer_class = UserListSerializer
     queryset = get_user_model().objects.all()
     pagination_class = ListPagination
+    keyset_ordering = ("id",)
 
     def get_queryset(self) -> QuerySet[User]:
         queryset = self.queryset
@@ -101,6 +196,20 @@ class UserListView(generics.ListAPIView):
 
         return queryset
 
+    async def list(self, request: Request, *args, **kwargs) -> Response:
+        term = request.query_params.get("search")
+        if term:
+            users = await sync_to_async(search.autocomplete)(
+                self.get_queryset(), term
+            )
+            serializer = self.get_serializer(users, many=True)
+            return Response(serializer.data)
+
+        queryset = await self.aget_queryset()
+        page = await self.apaginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -141,11 +250,43 @@ class UserListView(generics.ListAPIView):
                         value="Brown"
                     )
                 ]
+            ),
+            OpenApiParameter(
+                name="search",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Autocomplete by prefix or fuzzy match on email, "
+                            "first or last name. Returns an unpaginated "
+                            "list of the best matches, empty for terms "
+                            "shorter than USER_SEARCH_MIN_LENGTH",
+                required=False,
+                examples=[
+                    OpenApiExample(
+                        name="search",
+                        value="bro"
+                    )
+                ]
+            ),
+            OpenApiParameter(
+                name="pagination",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Pagination mode: `page` numbers or opaque "
+                            "`cursor` links, which also accept "
+                            "`count=exact|estimated`",
+                required=False,
+                enum=["page", "cursor"],
+                examples=[
+                    OpenApiExample(
+                        name="pagination",
+                        value="cursor"
+                    )
+                ]
             )
         ]
     )
-    def get(self, request: Request, *args, **kwargs) -> Response:
-        return super().get(request, *args, **kwargs)
+    async def get(self, request: Request, *args, **kwargs) -> Response:
+        return await self.list(request, *args, **kwargs)
 
 
 class UserYourProfileView(
@@ -154,13 +295,71 @@ class UserYourProfileView(
     serializer_class = UserDetailSerializer
 
     def get_object(self) -> User:
-        return self.request.user
+        # request.user may come from the token cache, counters and
+        # profile fields are read fresh
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        etag = make_etag(
+            request.accepted_renderer.format,
+            "user",
+            request.user.pk,
+            cache.get_version("user", request.user.pk)
+        )
+        response = not_modified(request, etag)
+        if response:
+            return response
+        return with_validators(
+            super().retrieve(request, *args, **kwargs), etag
+        )
 
 
 class UserOtherProfileView(generics.RetrieveAPIView):
     serializer_class = UserDetailSerializer
     queryset = get_user_model().objects.all()
 
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        etag = make_etag(
+            request.accepted_renderer.format,
+            "user",
+            kwargs["pk"],
+            cache.get_version("user", kwargs["pk"])
+        )
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        def serialize() -> dict:
+            return dict(self.get_serializer(self.get_object()).data)
+
+        data = cache.read_through(
+            "user",
+            kwargs["pk"],
+            serialize,
+            variant=request.build_absolute_uri("/")
+        )
+        return with_validators(Response(data), etag)
+
+
+class UserSubscribersView(PaginationModeMixin, generics.ListAPIView):
+    serializer_class = UserListSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("id",)
+
+    def get_queryset(self) -> QuerySet[User]:
+        user = get_object_or_404(get_user_model(), pk=self.kwargs["pk"])
+        return get_user_model().objects.filter(subscriptions=user)
+
+
+class UserSubscriptionsView(PaginationModeMixin, generics.ListAPIView):
+    serializer_class = UserListSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("id",)
+
+    def get_queryset(self) -> QuerySet[User]:
+        user = get_object_or_404(get_user_model(), pk=self.kwargs["pk"])
+        return get_user_model().objects.filter(subscribers=user)
+
 
 @extend_schema_view(
     post=extend_schema(
@@ -192,24 +391,24 @@ class UserOtherProfileView(generics.RetrieveAPIView):
         }
     )
 )
-class UserSubscribeView(APIView):
-    def post(self, request: Request, pk: int) -> Response:
-        user = get_object_or_404(get_user_model(), pk=pk)
+class UserSubscribeView(AsyncViewMixin, APIView):
+    async def post(self, request: Request, pk: int) -> Response:
+        user = await aget_object_or_404(get_user_model(), pk=pk)
 
-        if user == request.user:
+        if user.pk == request.user.pk:
             return Response(
                 {"detail": "You cannot subscribe to yourself"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if request.user.subscriptions.filter(pk=pk).exists():
+        if not await sync_to_async(interactions.subscribe)(
+            request.user, user
+        ):
             return Response(
                 {"detail": "Already subscribed"},
                 status=status.HTTP_200_OK
             )
 
-        request.user.subscriptions.add(user)
-
         return Response(
             {"detail": f"You are now subscribed to {user.email}"},
             status=status.HTTP_201_CREATED
@@ -241,12 +440,11 @@ class UserSubscribeView(APIView):
         }
     )
 )
-class UserUnsubscribeView(APIView):
-    def post(self, request: Request, pk: int) -> Response:
-        user = get_object_or_404(get_user_model(), pk=pk)
+class UserUnsubscribeView(AsyncViewMixin, APIView):
+    async def post(self, request: Request, pk: int) -> Response:
+        user = await aget_object_or_404(get_user_model(), pk=pk)
 
-        if request.user.subscriptions.filter(pk=pk).exists():
-            request.user.subscriptions.remove(user)
+        if await sync_to_async(interactions.unsubscribe)(request.user, user):
             return Response(
                 {"detail": f"You are unsubscribed from {user.email}"},
                 status=status.HTTP_201_CREATED
@@ -258,10 +456,55 @@ class UserUnsubscribeView(APIView):
         )
 
 
-class PostViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    post=extend_schema(
+        request=BulkSubscribeSerializer,
+        responses=OpenApiResponse(
+            description="Outcome of every item with the status code "
+                        "and message of the single-user endpoints",
+            examples=[OpenApiExample(
+                name="bulk_subscribe",
+                value={
+                    "subscribe": [{
+                        "id": 2,
+                        "status": 201,
+                        "detail": "You are now subscribed "
+                                  "to user@example.com"
+                    }],
+                    "unsubscribe": [{
+                        "id": 3,
+                        "status": 200,
+                        "detail": "You are not subscribed "
+                                  "to other@example.com"
+                    }],
+                }
+            )]
+        )
+    )
+)
+class UserBulkSubscribeView(APIView):
+    def post(self, request: Request) -> Response:
+        serializer = BulkSubscribeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = interactions.bulk_subscribe(
+            request.user,
+            serializer.validated_data["subscribe"],
+            serializer.validated_data["unsubscribe"]
+        )
+
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class PostViewSet(
+    AsyncViewMixin,
+    PaginationModeMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = PostCreateUpdateSerializer
     queryset = Post.objects.all()
     pagination_class = ListPagination
+    comments_preview_size = 3
 
     def get_permissions(self) -> list[BasePermission]:
         if self.action in (
@@ -270,10 +513,29 @@ class PostViewSet(viewsets.ModelViewSet):
             return [IsAuthor()]
         return [IsAuthenticated()]
 
+    @property
+    def keyset_ordering(self) -> tuple[str, ...]:
+        if self.action == "likes":
+            return ("id",)
+        if self.action == "list" and self.request.query_params.get("q"):
+            return ("-rank", "-id")
+        return ("-created_at", "-id")
+
     @staticmethod
-    def params_to_ints(qs: str) -> list[int]:
+    def params_to_ints(qs: str, param: str) -> list[int]:
         """Converts a list of string IDs to a list of integers"""
-        return [int(str_id) for str_id in qs.split(",")]
+        try:
+            ids = [int(str_id) for str_id in qs.split(",")]
+        except ValueError:
+            raise ValidationError({param: [
+                f"Expected comma-separated integer IDs, got '{qs}'"
+            ]})
+        if not all(0 < pk <= BigIntegerField.MAX_BIGINT for pk in ids):
+            raise ValidationError({param: [
+                f"Expected IDs between 1 and {BigIntegerField.MAX_BIGINT}, "
+                f"got '{qs}'"
+            ]})
+        return ids
 
     def get_serializer_class(self):
         serializer_class = self.serializer_class
@@ -284,8 +546,16 @@ class PostViewSet(viewsets.ModelViewSet):
             return PostDetailSerializer
         elif self.action == "comment":
             return CommentCreateSerializer
+        elif self.action == "comments":
+            return CommentSerializer
+        elif self.action == "likes":
+            return UserListSerializer
+        elif self.action == "bulk_like":
+            return BulkLikeSerializer
         elif self.action == "schedule":
             return PostCreateScheduleSerializer
+        elif self.action == "trending":
+            return TrendingPostSerializer
 
         return serializer_class
 
@@ -296,14 +566,23 @@ class PostViewSet(viewsets.ModelViewSet):
             queryset = (
                 queryset
                 .select_related("author")
-                .prefetch_related("likes", "tags")
+                .prefetch_related("tags")
             )
 
         if self.action == "retrieve":
             queryset = (
                 queryset
                 .select_related("author")
-                .prefetch_related("likes", "tags", "comments")
+                .prefetch_related(
+                    "tags",
+                    Prefetch(
+                        "comments",
+                        queryset=Comment.objects.select_related(
+                            "commentator"
+                        )[:self.comments_preview_size],
+                        to_attr="latest_comments"
+                    )
+                )
             )
 
         user_posts = self.request.query_params.get("my")
@@ -312,22 +591,65 @@ class PostViewSet(viewsets.ModelViewSet):
         )
         liked_posts = self.request.query_params.get("liked")
         tags = self.request.query_params.get("tags")
+        tag_names = self.request.query_params.get("tag_names")
+        tags_mode = self.request.query_params.get("tags_mode", "any")
+        search = self.request.query_params.get("q")
 
         if user_posts == "1":
             queryset = queryset.filter(author=self.request.user)
         if subscriptions_posts == "1":
-            queryset = queryset.filter(
-                author__in=self.request.user.subscriptions.all()
+            limit, cursor = None, None
+            if self.action == "list" and isinstance(
+                self.paginator, KeysetPagination
+            ) and not (
+                user_posts == "1" or liked_posts == "1"
+                or tags or tag_names or search
+            ):
+                # Only the plain feed pages in the order of its indexes
+                limit, cursor = self.paginator.get_window(
+                    self.request, Post, view=self
+                )
+            queryset = feed.feed_queryset(
+                self.request.user, queryset, limit, cursor
             )
         if liked_posts == "1":
             queryset = queryset.filter(
-                likes__id=self.request.user.id
+                Exists(
+                    Like.objects.filter(
+                        post_id=OuterRef("pk"), user=self.request.user
+                    )
+                )
+            )
+        if tags or tag_names:
+            if tags_mode not in tagging.TAG_MODES:
+                choices = ", ".join(tagging.TAG_MODES)
+                raise ValidationError(
+                    {"tags_mode": [f"Choose one of {choices}"]}
+                )
+            queryset = tagging.filter_by_tags(
+                queryset,
+                tag_ids=self.params_to_ints(tags, "tags") if tags else (),
+                tag_names=tag_names.split(",") if tag_names else (),
+                mode=tags_mode
+            )
+        if search:
+            query = SearchQuery(
+                search,
+                config=settings.POST_SEARCH_CONFIG,
+                search_type="websearch"
+            )
+            queryset = (
+                queryset
+                .filter(search_vector=query)
+                .annotate(
+                    rank=Cast(
+                        SearchRank(F("search_vector"), query), FloatField()
+                    )
+                )
+                .order_by("-rank", "-id")
             )
-        if tags:
-            tag_ids = self.params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
 
-        return queryset.distinct()
+        return queryset
 
     def perform_create(
         self,
@@ -335,6 +657,33 @@ class PostViewSet(viewsets.ModelViewSet):
     ) -> None:
         serializer.save(author=self.request.user)
 
+    async def retrieve(
+        self,
+        request: Request,
+        *args,
+        **kwargs
+    ) -> Response:
+        etag = make_etag(
+            request.accepted_renderer.format,
+            "post",
+            kwargs["pk"],
+            await cache.aget_version("post", kwargs["pk"])
+        )
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        async def serialize() -> dict:
+            return dict(self.get_serializer(await self.aget_object()).data)
+
+        data = await cache.aread_through(
+            "post",
+            kwargs["pk"],
+            serialize,
+            variant=request.build_absolute_uri("/")
+        )
+        return with_validators(Response(data), etag)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -388,11 +737,84 @@ class PostViewSet(viewsets.ModelViewSet):
                         value=[1, 2]
                     )
                 ]
+            ),
+            OpenApiParameter(
+                name="tag_names",
+                type={"type": "array", "items": {"type": "string"}},
+                location=OpenApiParameter.QUERY,
+                description="Search for posts by tag names",
+                required=False,
+                examples=[
+                    OpenApiExample(
+                        name="tag_names",
+                        value=["travel", "food"]
+                    )
+                ]
+            ),
+            OpenApiParameter(
+                name="tags_mode",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Match posts having `any` (default) "
+                            "or `all` of the requested tags",
+                required=False,
+                enum=list(tagging.TAG_MODES),
+            ),
+            OpenApiParameter(
+                name="q",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Full-text search over titles and content, "
+                            "results are ranked by relevance",
+                required=False,
+                examples=[
+                    OpenApiExample(
+                        name="q",
+                        value="summer holidays"
+                    )
+                ]
+            ),
+            OpenApiParameter(
+                name="pagination",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Pagination mode: `page` numbers or opaque "
+                            "`cursor` links, which also accept "
+                            "`count=exact|estimated`",
+                required=False,
+                enum=["page", "cursor"],
+                examples=[
+                    OpenApiExample(
+                        name="pagination",
+                        value="cursor"
+                    )
+                ]
             )
         ]
     )
-    def list(self, request: Request, *args, **kwargs) -> Response:
-        return super().list(request, *args, **kwargs)
+    async def list(self, request: Request, *args, **kwargs) -> Response:
+        queryset = await self.aget_queryset()
+        page = await self.apaginate_queryset(queryset)
+
+        versions = await cache.aget_versions(
+            "post", [post.pk for post in page]
+        )
+        etag = make_etag(
+            request.accepted_renderer.format,
+            self.get_paginated_response([]).data,
+            [
+                (post.pk, post.updated_at, versions[post.pk])
+                for post in page
+            ]
+        )
+        response = not_modified(request, etag)
+        if response:
+            return response
+
+        serializer = self.get_serializer(page, many=True)
+        return with_validators(
+            self.get_paginated_response(serializer.data), etag
+        )
 
     @extend_schema(
         request=None,
@@ -430,22 +852,21 @@ class PostViewSet(viewsets.ModelViewSet):
         methods=["POST"],
         detail=True
     )
-    def like(self, request: Request, pk: int) -> Response:
-        post = self.get_object()
+    async def like(self, request: Request, pk: int) -> Response:
+        post = await self.aget_object()
 
-        if post.author == request.user:
+        if post.author_id == request.user.pk:
             return Response(
                 {"detail": "You cannot like your own post"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if post.likes.filter(pk=request.user.pk).exists():
+        if not await sync_to_async(interactions.like)(request.user, post):
             return Response(
                 {"detail": "You already liked this post"},
                 status=status.HTTP_200_OK
             )
 
-        post.likes.add(request.user)
         return Response(
             {"detail": "You successfully liked this post"},
             status=status.HTTP_201_CREATED
@@ -478,11 +899,10 @@ class PostViewSet(viewsets.ModelViewSet):
         methods=["POST"],
         detail=True
     )
-    def unlike(self, request: Request, pk: int) -> Response:
-        post = self.get_object()
+    async def unlike(self, request: Request, pk: int) -> Response:
+        post = await self.aget_object()
 
-        if post.likes.filter(pk=request.user.pk).exists():
-            post.likes.remove(request.user)
+        if await sync_to_async(interactions.unlike)(request.user, post):
             return Response(
                 {"detail": "You successfully unliked this post"},
                 status=status.HTTP_201_CREATED
@@ -502,41 +922,131 @@ class PostViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(
-            post=post,
-            commentator=self.request.user
-        )
+        # The comment and the counter it bumps commit together
+        with transaction.atomic():
+            serializer.save(
+                post=post,
+                commentator=self.request.user
+            )
 
         return Response(
             serializer.data,
             status=status.HTTP_201_CREATED
         )
 
+    @extend_schema(
+        responses=OpenApiResponse(
+            description="Outcome of every item with the status code "
+                        "and message of the single-post endpoints",
+            examples=[OpenApiExample(
+                name="bulk_like",
+                value={
+                    "like": [{
+                        "id": 1,
+                        "status": 201,
+                        "detail": "You successfully liked this post"
+                    }],
+                    "unlike": [{
+                        "id": 2,
+                        "status": 200,
+                        "detail": "You did not like this post"
+                    }],
+                }
+            )]
+        )
+    )
     @action(
         methods=["POST"],
-        detail=False
+        detail=False,
+        url_path="bulk-like"
     )
-    def schedule(self, request: Request) -> Response:
+    def bulk_like(self, request: Request) -> Response:
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        created_at = serializer.validated_data.pop("created_at")
-        serializer.validated_data["author"] = self.request.user
-
-        clocked_time = ClockedSchedule.objects.create(
-            clocked_time=created_at
+        results = interactions.bulk_like(
+            request.user,
+            serializer.validated_data["like"],
+            serializer.validated_data["unlike"]
         )
-        PeriodicTask.objects.create(
-            name=f"Delayed post #{clocked_time.id}",
-            task="user.tasks.delayed_post",
-            clocked=clocked_time,
-            description="This task publishes a post "
-                        "at the exact time selected by the user",
-            kwargs=json.dumps(serializer.validated_data),
-            one_off=True
+
+        return Response(results, status=status.HTTP_200_OK)
+
+    @extend_schema(responses=CommentSerializer(many=True))
+    @action(
+        methods=["GET"],
+        detail=True,
+        pagination_class=KeysetPagination
+    )
+    def comments(self, request: Request, pk: int) -> Response:
+        post = self.get_object()
+
+        queryset = post.comments.select_related("commentator")
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(responses=UserListSerializer(many=True))
+    @action(
+        methods=["GET"],
+        detail=True,
+        pagination_class=KeysetPagination
+    )
+    def likes(self, request: Request, pk: int) -> Response:
+        post = self.get_object()
+
+        queryset = get_user_model().objects.filter(liked_posts=post)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        parameters=TRENDING_PARAMETERS,
+        responses=TrendingPostSerializer(many=True)
+    )
+    @action(
+        methods=["GET"],
+        detail=False
+    )
+    def trending(self, request: Request) -> Response:
+        posts = trending.ranked(
+            "posts",
+            Post.objects.select_related("author").prefetch_related("tags"),
+            *trending_params(request)
         )
+        serializer = self.get_serializer(posts, many=True)
+
+        return Response(serializer.data)
+
+    @action(
+        methods=["POST"],
+        detail=False
+    )
+    def schedule(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        scheduled = serializer.save(author=self.request.user)
+        if scheduled.publish_at <= timezone.now():
+            transaction.on_commit(lambda: delayed_post.delay(scheduled.pk))
 
         return Response(
             {"detail": "Post scheduled"},
             status=status.HTTP_201_CREATED
         )
+
+
+class TagTrendingView(APIView):
+    @extend_schema(
+        parameters=TRENDING_PARAMETERS,
+        responses=TrendingTagSerializer(many=True)
+    )
+    def get(self, request: Request) -> Response:
+        tags = trending.ranked(
+            "tags", Tag.objects.all(), *trending_params(request)
+        )
+        serializer = TrendingTagSerializer(tags, many=True)
+
+        return Response(serializer.data)